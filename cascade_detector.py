@@ -0,0 +1,87 @@
+# cascade_detector.py
+
+import json
+import numpy as np
+from darkflow.net.registry import ModelRegistry
+from vehicle_detector import VehicleDetector
+import config
+
+class CascadeDetector(VehicleDetector):
+    """
+    A VehicleDetector that runs a small, fast model on every image and escalates
+    to the full model only when the small model's result is ambiguous: when it
+    reports vehicles it is unsure about, or a crowd it is likely to undercount.
+    The boxes, and so the lane counts, come from whichever stage was decisive.
+
+    Both models are hosted in one ModelRegistry, so they share their thread pools
+    instead of contending for the CPU.
+    """
+
+    STAGES = ('tiny', 'full')
+
+    def __init__(self):
+        """
+        Initializes both stages. As with VehicleDetector, each model is only loaded
+        the first time it is needed.
+        """
+        self.registry = ModelRegistry()
+        super().__init__(registry=self.registry, model_name='full')
+        self.tiny = VehicleDetector(
+            config.CASCADE_MODEL_CFG, config.CASCADE_MODEL_WEIGHTS, config.CASCADE_THRESHOLD,
+            registry=self.registry, model_name='tiny')
+
+        # Number of images each stage decided, and the stage that decided the last one
+        self.stage_counts = dict.fromkeys(self.STAGES, 0)
+        self.last_stage = None
+
+    def is_ambiguous(self, scores):
+        """
+        Tells whether the small model's vehicle detections on an image need a second
+        opinion from the full model.
+
+        Args:
+            scores (np.ndarray): Confidence scores of the vehicles the small model found.
+
+        Returns:
+            bool: True if the full model should decide.
+        """
+        uncertain = np.count_nonzero(scores < config.CASCADE_CONFIDENT_SCORE)
+        return uncertain > config.CASCADE_MAX_UNCERTAIN or len(scores) >= config.CASCADE_CROWD_COUNT
+
+    def vehicle_boxes(self, image, image_bytes=None):
+        """
+        Runs the cascade on an image and keeps only the vehicle boxes.
+
+        Args:
+            image (np.ndarray): A BGR image as returned by `cv2.imread`.
+            image_bytes (bytes, optional): The encoded image, see `VehicleDetector.predict`.
+                                           Each stage keys its own detection cache with it.
+
+        Returns:
+            tuple: An (N, 4) array of (top_x, top_y, bottom_x, bottom_y) boxes and an
+                   (N,) array of their class columns in `config.VEHICLE_CLASSES`.
+        """
+        boxes, class_ids, scores = self.tiny.vehicle_detections(image, image_bytes)
+        stage = 'full' if self.is_ambiguous(scores) else 'tiny'
+        self.stage_counts[stage] += 1
+        self.last_stage = stage
+        if stage == 'tiny':
+            return boxes, class_ids
+        return super().vehicle_boxes(image, image_bytes)
+
+if __name__ == '__main__':
+    """
+    Main execution block to allow this script to be run directly from the command line
+    for testing purposes.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detect vehicles in images with the model cascade.")
+    parser.add_argument("image_paths", type=str, nargs='+', help="Paths to the input image files.")
+    args = parser.parse_args()
+
+    detector = CascadeDetector()
+    for image_path in args.image_paths:
+        counts = detector.detect_vehicles(image_path)
+        print(f"{image_path} ({detector.last_stage} model): {json.dumps(counts)}")
+    print("Images decided per stage:", json.dumps(detector.stage_counts))
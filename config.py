@@ -26,6 +26,81 @@ MODEL_NAMES = os.path.join(BASE_DIR, "cfg", "coco.names")
 # Detections with a confidence score below this value will be ignored.
 DETECTION_THRESHOLD = 0.4
 
+# --- Cascade Detection Configuration ---
+# The cascade detector runs this small model on every image and only falls
+# back to the model above when its result is ambiguous.
+CASCADE_MODEL_CFG = os.path.join(BASE_DIR, "cfg", "tiny-yolo-voc.cfg")
+CASCADE_MODEL_WEIGHTS = os.path.join(BASE_DIR, "bin", "tiny-yolo-voc.weights")
+
+# Detection threshold of the small model. It is below DETECTION_THRESHOLD so
+# that vehicles the small model is unsure about are seen, not silently missed.
+CASCADE_THRESHOLD = 0.2
+
+# Vehicles the small model scores at least this high are taken as certain.
+CASCADE_CONFIDENT_SCORE = 0.6
+
+# Number of uncertain vehicles (scored between CASCADE_THRESHOLD and
+# CASCADE_CONFIDENT_SCORE) the small model may report before the image is
+# handed to the full model.
+CASCADE_MAX_UNCERTAIN = 0
+
+# Images with at least this many vehicles always go to the full model: the
+# small model undercounts dense, occluded queues, which decide green times.
+CASCADE_CROWD_COUNT = 15
+
+# --- Vehicle Class Configuration ---
+# Vehicle classes used for signal timing. Per-lane count matrices produced by
+# the detector have one column per class, in this order.
+VEHICLE_CLASSES = ['car', 'bus', 'truck', 'rickshaw', 'bike']
+
+# Maps detector labels to the vehicle classes above. Detections whose label
+# is not listed here are ignored.
+DETECTION_LABEL_CLASSES = {
+    'car': 'car',
+    'bus': 'bus',
+    'truck': 'truck',
+    'rickshaw': 'rickshaw',
+    'motorbike': 'bike',
+    'bike': 'bike'
+}
+
+# Average time (in seconds) for one vehicle of each class to clear the intersection.
+VEHICLE_PASS_TIMES = {'car': 2.0, 'bus': 2.5, 'truck': 2.5, 'rickshaw': 2.25, 'bike': 1.0}
+
+# --- Lane Zone Configuration ---
+# Polygon outlining each approach lane in the camera image, given as (x, y)
+# vertices expressed as fractions of the image width and height so that the
+# same zones apply at any camera resolution. The defaults reproduce a simple
+# quadrant split; trace the real lanes for each camera angle.
+LANE_ZONES = {
+    'right': [(0.5, 0.0), (1.0, 0.0), (1.0, 0.5), (0.5, 0.5)],
+    'left': [(0.0, 0.5), (0.5, 0.5), (0.5, 1.0), (0.0, 1.0)],
+    'up': [(0.0, 0.0), (0.5, 0.0), (0.5, 0.5), (0.0, 0.5)],
+    'down': [(0.5, 0.5), (1.0, 0.5), (1.0, 1.0), (0.5, 1.0)]
+}
+
+# Stop line of each lane as a segment between two (x, y) points, in the same
+# fractional image coordinates as LANE_ZONES. A tracked vehicle is counted as
+# discharged when its center crosses this line.
+STOP_LINES = {
+    'right': [(0.55, 0.0), (0.55, 0.5)],
+    'left': [(0.45, 0.5), (0.45, 1.0)],
+    'up': [(0.0, 0.45), (0.5, 0.45)],
+    'down': [(0.5, 0.55), (1.0, 0.55)]
+}
+
+# --- Tracking Configuration ---
+# Minimum IoU between a predicted track box and a detection to associate them.
+TRACKER_IOU_THRESHOLD = 0.3
+# Consecutive frames a track may go unmatched before it is dropped.
+TRACKER_MAX_MISSED = 5
+# Matched frames required before a track is confirmed as a real vehicle.
+TRACKER_MIN_HITS = 3
+# Speed (pixels per second) below which a confirmed vehicle counts as queued.
+TRACKER_QUEUE_SPEED = 20.0
+# Length of the sliding window (seconds) used for arrival rates.
+TRACKER_RATE_WINDOW = 60.0
+
 # --- Simulation Configuration ---
 # Screen dimensions for the Pygame simulation window.
 SIM_WIDTH = 1400
@@ -49,3 +124,15 @@ ARDUINO_BAUD_RATE = 9600
 # --- Asset Paths ---
 # Directory containing images for the simulation GUI.
 ASSETS_DIR = os.path.join(BASE_DIR, "images")
+
+# --- Detection Cache Configuration ---
+# Set to True to cache detection results on disk, keyed by the image content,
+# model configuration, weights and threshold. Re-analysing the same images then
+# skips inference entirely.
+ENABLE_DETECTION_CACHE = True
+
+# Directory where cached detection results are stored.
+DETECTION_CACHE_DIR = os.path.join(BASE_DIR, "cache", "detections")
+
+# Maximum number of cached results kept before the least recently used are evicted.
+DETECTION_CACHE_MAX_ENTRIES = 10000
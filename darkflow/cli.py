@@ -1,10 +1,14 @@
 from .defaults import argHandler #Import the default arguments
 import os
+import sys
+import subprocess
 from .net.build import TFNet
+from .utils.cpu import partition_cores
 
 def cliHandler(args):
     FLAGS = argHandler()
     FLAGS.setDefaults()
+    argv = list(args) # parseArgs converts values in place
     FLAGS.parseArgs(args)
 
     # make sure all necessary dirs exist
@@ -19,6 +23,27 @@ def cliHandler(args):
 
     _get_dir(requiredDirectories)
 
+    # run each predict shard in its own process
+    if FLAGS.shards > 1 and FLAGS.shard < 0 and \
+        not (FLAGS.demo or FLAGS.train or FLAGS.savepb):
+        # unless told otherwise, give each shard its own cores
+        plans = [dict()] * FLAGS.shards
+        if not (FLAGS.cpuPin or FLAGS.intraOp or FLAGS.interOp):
+            plans = partition_cores(FLAGS.shards)
+        workers = list()
+        for shard, plan in enumerate(plans):
+            extra, env = ['--shard', str(shard)], None
+            for flag in sorted(plan):
+                extra += ['--' + flag, str(plan[flag])]
+            if plan: # OpenMP / MKL kernels size their own pools
+                env = dict(os.environ, OMP_NUM_THREADS = str(plan['intraOp']))
+            workers.append(subprocess.Popen(
+                [sys.executable] + argv + extra, env = env))
+        failed = sum(worker.wait() != 0 for worker in workers)
+        if failed:
+            exit('{} of {} shards failed'.format(failed, FLAGS.shards))
+        print('Done'); return
+
     # fix FLAGS.load to appropriate type
     try: FLAGS.load = int(FLAGS.load)
     except: pass
@@ -59,7 +59,8 @@ def box_constructor(meta,np.ndarray[float,ndim=3] net_out_in):
         double[:] anchors = np.asarray(meta['anchors'])
         list boxes = list()
 
-    H, W, _ = meta['out_size']
+    # the actual grid, as the net input size may vary per call
+    H, W = net_out_in.shape[0], net_out_in.shape[1]
     C = meta['classes']
     B = meta['num']
     
@@ -94,4 +95,5 @@ def box_constructor(meta,np.ndarray[float,ndim=3] net_out_in):
     
     
     #NMS                    
-    return NMS(np.ascontiguousarray(probs).reshape(H*W*B,C), np.ascontiguousarray(Bbox_pred).reshape(H*B*W,5))
+    return NMS(np.ascontiguousarray(probs).reshape(H*W*B,C), np.ascontiguousarray(Bbox_pred).reshape(H*B*W,5),
+        meta.get('nms_iou', 0.4), meta.get('nms_agnostic', False), meta.get('nms_top_k', 0))
@@ -5,92 +5,115 @@ from libc.math cimport exp
 from ..utils.box import BoundBox
 
 
-
-#OVERLAP
+#GREEDY SUPPRESSION OVER SCORE-SORTED CANDIDATES
 @cython.boundscheck(False) # turn off bounds-checking for entire function
 @cython.wraparound(False)  # turn off negative index wrapping for entire function
 @cython.cdivision(True)
-cdef float overlap_c(float x1, float w1 , float x2 , float w2):
+cdef np.intp_t greedy_keep_c(float[:, ::1] corners, float[::1] areas,
+                            float iou_threshold, int top_k,
+                            np.uint8_t[::1] suppressed, np.intp_t[::1] keep):
+    """
+    corners / areas hold the candidates in descending score order,
+    contiguously, so each keeper is compared against the remaining
+    candidates in a single stride-1 pass. Returns the number of
+    keepers written (as positions) into keep.
+    """
     cdef:
-        float l1,l2,left,right
-    l1 = x1 - w1 /2.
-    l2 = x2 - w2 /2.
-    left = max(l1,l2)
-    r1 = x1 + w1 /2.
-    r2 = x2 + w2 /2.
-    right = min(r1, r2)
-    return right - left;
+        np.intp_t n, i, j, kept = 0
+        float w, h, inter, union
+    n = corners.shape[0]
+    for i in range(n):
+        if suppressed[i]: continue
+        keep[kept] = i
+        kept += 1
+        if top_k and kept == top_k: break
+        for j in range(i + 1, n):
+            if suppressed[j]: continue
+            w = min(corners[i, 2], corners[j, 2]) - max(corners[i, 0], corners[j, 0])
+            if w <= 0: continue
+            h = min(corners[i, 3], corners[j, 3]) - max(corners[i, 1], corners[j, 1])
+            if h <= 0: continue
+            inter = w * h
+            union = areas[i] + areas[j] - inter
+            if union > 0 and inter / union >= iou_threshold:
+                suppressed[j] = 1
+    return kept
 
-#BOX INTERSECTION
-@cython.boundscheck(False) # turn off bounds-checking for entire function
-@cython.wraparound(False)  # turn off negative index wrapping for entire function
-@cython.cdivision(True)
-cdef float box_intersection_c(float ax, float ay, float aw, float ah, float bx, float by, float bw, float bh):
-    cdef:
-        float w,h,area
-    w = overlap_c(ax, aw, bx, bw)
-    h = overlap_c(ay, ah, by, bh)
-    if w < 0 or h < 0: return 0
-    area = w * h
-    return area
+def _keep_by_score(corners, areas, candidates, scores,
+                   float iou_threshold, int top_k):
+    order = candidates[np.argsort(-scores, kind='stable')]
+    n = order.shape[0]
+    suppressed = np.zeros(n, dtype=np.uint8)
+    keep = np.empty(n, dtype=np.intp)
+    kept = greedy_keep_c(np.ascontiguousarray(corners[order]),
+        np.ascontiguousarray(areas[order]), iou_threshold, top_k,
+        suppressed, keep)
+    return order[keep[:kept]]
 
-#BOX UNION
-@cython.boundscheck(False) # turn off bounds-checking for entire function
-@cython.wraparound(False)  # turn off negative index wrapping for entire function
-@cython.cdivision(True)
-cdef float box_union_c(float ax, float ay, float aw, float ah, float bx, float by, float bw, float bh):
-    cdef:
-        float i,u
-    i = box_intersection_c(ax, ay, aw, ah, bx, by, bw, bh)
-    u = aw * ah + bw * bh -i
-    return u
-
-
-#BOX IOU
-@cython.boundscheck(False) # turn off bounds-checking for entire function
-@cython.wraparound(False)  # turn off negative index wrapping for entire function
-@cython.cdivision(True)
-cdef float box_iou_c(float ax, float ay, float aw, float ah, float bx, float by, float bw, float bh):
-    return box_intersection_c(ax, ay, aw, ah, bx, by, bw, bh) / box_union_c(ax, ay, aw, ah, bx, by, bw, bh);
+#FAST NMS
+def nms_keep(float[:, ::1] final_probs, float[:, ::1] final_bbox,
+             float iou_threshold = 0.4, bint class_agnostic = False,
+             int top_k = 0):
+    """
+    Sort-based non-maximum suppression over (x, y, w, h) boxes.
+    Suppressed scores are zeroed in final_probs in place, and the
+    sorted indices of rows that survive in at least one class are
+    returned. Rows and classes with no nonzero score are skipped
+    up front, and each class is suppressed greedily in descending
+    score order. With class_agnostic, boxes of different classes
+    suppress each other by their best class score. top_k > 0 caps
+    the number of keepers per class (or overall, if class_agnostic).
+    """
+    probs = np.asarray(final_probs)
+    bbox = np.asarray(final_bbox)
+    rows = np.flatnonzero(probs.any(axis = 1))
+    if not rows.shape[0]: return rows
 
+    # corners and areas of the live rows only
+    xy, half = bbox[rows, :2], bbox[rows, 2:4] / 2.
+    corners = np.hstack([xy - half, xy + half]).astype(np.float32)
+    areas = (bbox[rows, 2] * bbox[rows, 3]).astype(np.float32)
+    live = probs[rows]
+    positions = np.arange(rows.shape[0])
 
+    if class_agnostic:
+        keep = _keep_by_score(corners, areas, positions,
+            live.max(axis = 1), iou_threshold, top_k)
+        dropped = np.setdiff1d(positions, keep, assume_unique = True)
+        probs[rows[dropped], :] = 0
+        return np.sort(rows[keep])
 
+    for class_loop in np.flatnonzero(live.any(axis = 0)):
+        candidates = np.flatnonzero(live[:, class_loop])
+        keep = _keep_by_score(corners, areas, candidates,
+            live[candidates, class_loop], iou_threshold, top_k)
+        dropped = np.setdiff1d(candidates, keep, assume_unique = True)
+        probs[rows[dropped], class_loop] = 0
+    return rows[probs[rows].any(axis = 1)]
 
 #NMS
 @cython.boundscheck(False) # turn off bounds-checking for entire function
 @cython.wraparound(False)  # turn off negative index wrapping for entire function
 @cython.cdivision(True)
-cdef NMS(float[:, ::1] final_probs , float[:, ::1] final_bbox):
+cdef NMS(float[:, ::1] final_probs , float[:, ::1] final_bbox,
+         float iou_threshold = 0.4, bint class_agnostic = False,
+         int top_k = 0):
     cdef list boxes = list()
-    cdef set indices = set()
     cdef:
-        np.intp_t pred_length,class_length,class_loop,index,index2
+        np.intp_t class_length, index
 
-  
-    pred_length = final_bbox.shape[0]
     class_length = final_probs.shape[1]
-    for class_loop in range(class_length):
-        for index in range(pred_length):
-            if final_probs[index,class_loop] == 0: continue
-            for index2 in range(index+1,pred_length):
-                if final_probs[index2,class_loop] == 0: continue
-                if index==index2 : continue
-                if box_iou_c(final_bbox[index,0],final_bbox[index,1],final_bbox[index,2],final_bbox[index,3],final_bbox[index2,0],final_bbox[index2,1],final_bbox[index2,2],final_bbox[index2,3]) >= 0.4:
-                    if final_probs[index2,class_loop] > final_probs[index, class_loop] :
-                        final_probs[index, class_loop] =0
-                        break
-                    final_probs[index2,class_loop]=0
-            
-            if index not in indices:
-                bb=BoundBox(class_length)
-                bb.x = final_bbox[index, 0]
-                bb.y = final_bbox[index, 1]
-                bb.w = final_bbox[index, 2]
-                bb.h = final_bbox[index, 3]
-                bb.c = final_bbox[index, 4]
-                bb.probs = np.asarray(final_probs[index,:])
-                boxes.append(bb)
-                indices.add(index)
+    keep = nms_keep(final_probs, final_bbox,
+        iou_threshold, class_agnostic, top_k)
+    for index in keep:
+        bb=BoundBox(class_length)
+        bb.x = final_bbox[index, 0]
+        bb.y = final_bbox[index, 1]
+        bb.w = final_bbox[index, 2]
+        bb.h = final_bbox[index, 3]
+        if final_bbox.shape[1] > 4: bb.c = final_bbox[index, 4]
+        bb.probs = np.asarray(final_probs[index,:])
+        boxes.append(bb)
     return boxes
 
 # cdef NMS(float[:, ::1] final_probs , float[:, ::1] final_bbox):
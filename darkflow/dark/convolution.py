@@ -153,4 +153,44 @@ class convolutional_layer(Layer):
         if kernel is None: return
         kernel = kernel.reshape(self.dnshape)
         kernel = kernel.transpose([2,3,1,0])
-        self.w['kernel'] = kernel
\ No newline at end of file
+        self.w['kernel'] = kernel
+
+def fold_batchnorm(layer, epsilon = 1e-5):
+    """
+    Fold the inference batch-norm of a convolution,
+    (x - mean) / (sqrt(var) + epsilon) * gamma, into its
+    kernel and biases, leaving a plain convolution.
+    Returns whether the layer was folded.
+    """
+    w = layer.w
+    if not getattr(layer, 'batch_norm', False): return False
+    bnorm = ['gamma', 'moving_mean', 'moving_variance']
+    if any(w.get(var) is None for var in bnorm + ['kernel']):
+        return False
+
+    scale = w['gamma'] / (np.sqrt(w['moving_variance']) + epsilon)
+    w['kernel'] = (w['kernel'] * scale).astype(np.float32)
+    w['biases'] = (w['biases'] - w['moving_mean'] * scale).astype(np.float32)
+    for var in bnorm:
+        del w[var], layer.wshape[var], layer.wsize[var]
+    layer.h.pop('is_training', None)
+    layer.batch_norm = False
+    return True
+
+def quantize_kernel(layer, bits = 8):
+    """
+    Replace the float kernel of a convolution by symmetric
+    per output channel integers, with the scales of the
+    channels in w['kernel_scale'] (kernel ~ int * scale).
+    Returns whether the layer was quantized.
+    """
+    kernel = layer.w.get('kernel')
+    if kernel is None or 'kernel_scale' in layer.w: return False
+    assert 1 < bits <= 8, 'Kernels are stored as int8'
+    top = 2 ** (bits - 1) - 1
+    peak = np.abs(kernel).max(axis = (0, 1, 2))
+    scale = np.where(peak > 0, peak / top, 1.).astype(np.float32)
+    quantized = np.clip(np.round(kernel / scale), -top, top)
+    layer.w['kernel'] = quantized.astype(np.int8)
+    layer.w['kernel_scale'] = scale
+    return True
@@ -1,5 +1,6 @@
-from ..utils.process import cfg_yielder
+from ..utils.process import cfg_parsed
 from .darkop import create_darkop
+from .convolution import fold_batchnorm, quantize_kernel
 from ..utils import loader
 import warnings
 import time
@@ -62,8 +63,8 @@ class Darknet(object):
         return a list of `layers` objects (darkop.py)
         given path to binaries/ and configs/
         """
-        args = [model, FLAGS.binary]
-        cfg_layers = cfg_yielder(*args)
+        args = [model, FLAGS.binary, FLAGS.cfgCache]
+        cfg_layers = cfg_parsed(*args)
         meta = dict(); layers = list()
         for i, info in enumerate(cfg_layers):
             if i == 0: meta = info; continue
@@ -71,6 +72,22 @@ class Darknet(object):
             layers.append(new)
         return meta, layers
 
+    def fold_batchnorm(self):
+        """
+        Fold batch-norm into the convolutions, for inference
+        only; returns the number of layers folded
+        """
+        return sum(fold_batchnorm(layer) for layer in self.layers)
+
+    def quantize(self, bits = 8):
+        """
+        Quantize the kernels of the convolutions to bits wide
+        integers; returns the number of layers quantized
+        """
+        convs = ['convolutional', 'conv-select', 'conv-extract']
+        return sum(quantize_kernel(layer, bits)
+            for layer in self.layers if layer.type in convs)
+
     def load_weights(self):
         """
         Use `layers` and Loader to load .weights file
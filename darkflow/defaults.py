@@ -15,6 +15,10 @@ class argHandler(dict):
         self.define('summary', '', 'path to TensorBoard summaries directory')
         self.define('annotation', '../pascal/VOCdevkit/ANN/', 'path to annotation directory')
         self.define('threshold', -0.1, 'detection threshold')
+        self.define('nmsIou', 0.4, 'IoU at which non-maximum suppression discards the weaker box')
+        self.define('nmsAgnostic', False, 'suppress overlapping boxes across classes, not only within a class')
+        self.define('nmsTopK', 0, 'keep at most this many boxes per class after suppression (0 = no limit)')
+        self.define('letterbox', False, 'keep the aspect ratio of inputs, padding them to the net input size')
         self.define('model', '', 'configuration of choice')
         self.define('trainer', 'rmsprop', 'training algorithm')
         self.define('momentum', 0.0, 'applicable for rmsprop and momentum optimizers')
@@ -22,8 +26,15 @@ class argHandler(dict):
         self.define('train', False, 'train the whole net')
         self.define('load', '', 'how to initialize the net? Either from .weights or a checkpoint, or even from scratch')
         self.define('savepb', False, 'save net and weight to a .pb file')
+        self.define('fold', True, 'build inference-only nets as constants, batch-norm folded into the convolutions')
+        self.define('quantize', False, 'with --savepb, export an int8-compressed graph: batch-norm folded, conv kernels stored as int8 (convs still run in float32)')
+        self.define('quantizeCheck', './test_images/', 'images to compare the int8-compressed and folded float32 nets on (empty = no check)')
         self.define('gpu', 0.0, 'how much gpu (from 0.0 to 1.0)')
         self.define('gpuName', '/gpu:0', 'GPU device name')
+        self.define('intraOp', 0, 'threads running each op (0 = one per core)')
+        self.define('interOp', 0, 'ops run concurrently (0 = tensorflow default)')
+        self.define('cpuPin', '', 'cores to pin the process to, e.g. 0-3,8 (empty = no pinning)')
+        self.define('threadPool', '', 'name of an inter-op thread pool shared by the sessions that name it (empty = tensorflow default)')
         self.define('lr', 1e-5, 'learning rate')
         self.define('keep',20,'Number of most recent training results to save')
         self.define('batch', 16, 'batch size')
@@ -31,10 +42,19 @@ class argHandler(dict):
         self.define('save', 2000, 'save checkpoint every ? training examples')
         self.define('demo', '', 'demo on webcam')
         self.define('queue', 1, 'process demo in batch')
+        self.define('prefetch', 2, 'number of decoded batches queued ahead of the net in predict')
+        self.define('resume', False, 'skip the images an interrupted predict run already processed')
+        self.define('shards', 1, 'split predict across this many worker processes by file name hash')
+        self.define('shard', -1, 'index of the predict shard to run in this process (-1 = spawn all shards)')
         self.define('json', False, 'Outputs bounding box information in json format.')
         self.define('saveVideo', False, 'Records video from input video or camera')
+        self.define('videoQueue', 32, 'frames queued for the saveVideo writer thread')
+        self.define('videoPolicy', 'block', 'when the saveVideo queue is full: block (lose nothing) or drop frames')
+        self.define('headless', False, 'benchmark a demo video without display, drawing only with saveVideo')
         self.define('pbLoad', '', 'path to .pb protobuf file (metaLoad must also be specified)')
         self.define('metaLoad', '', 'path to .meta file generated during --savepb that corresponds to .pb file')
+        self.define('graphCache', './built_graph/cache/', 'directory of const graphs cached by cfg and weights hash, empty to disable')
+        self.define('cfgCache', './built_graph/cfg/', 'directory of parsed cfgs cached by content hash, empty to disable')
 
     def define(self, argName, default, description):
         self[argName] = default
@@ -0,0 +1,103 @@
+from concurrent.futures import Future
+import numpy as np
+import collections
+import threading
+import time
+
+class MicroBatcher(object):
+    """
+    Merges the single image requests of concurrent callers into
+    batches in front of a TFNet: a worker thread takes the oldest
+    request, waits at most max_wait seconds for others to fill the
+    batch up to max_batch images, forwards them in one sess.run and
+    resolves the future of each request with its own Detections.
+
+    A lone request therefore waits max_wait at most, while under
+    load every sess.run carries a full batch. Requests for another
+    input size than the oldest one wait for a later batch.
+    """
+
+    def __init__(self, tfnet, max_batch = None, max_wait = .005):
+        self.tfnet = tfnet
+        self.max_batch = max_batch or tfnet.FLAGS.batch
+        self.max_wait = max_wait
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target = self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, im, size = None):
+        """
+        Queue the BGR image im, returns a Future of its
+        Detections; size is as in return_predict_arrays
+        """
+        # checked here, so a bad image fails its own caller
+        # instead of every request merged into its batch
+        assert isinstance(im, np.ndarray) and im.ndim == 3 \
+            and im.size, 'Image is not a non-empty 3-dimensional np.ndarray'
+        future = Future()
+        with self._cond:
+            if self._closed: raise RuntimeError('MicroBatcher is closed')
+            self._pending.append((im, size, future))
+            self._cond.notify()
+        return future
+
+    def return_predict_arrays(self, im, size = None):
+        return self.submit(im, size).result()
+
+    def return_predict(self, im, size = None):
+        return self.submit(im, size).result().to_dicts()
+
+    def _next_batch(self):
+        """
+        Wait for requests, then for the batch to fill up or the
+        oldest request to have waited max_wait; None once closed
+        """
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending: return None
+            deadline = time.time() + self.max_wait
+            size = self._pending[0][1]
+            while True:
+                ready = sum(req[1] == size for req in self._pending)
+                left = deadline - time.time()
+                if ready >= self.max_batch or left <= 0 \
+                    or self._closed: break
+                self._cond.wait(left)
+
+            batch, rest = list(), collections.deque()
+            for req in self._pending:
+                if req[1] == size and len(batch) < self.max_batch:
+                    batch.append(req)
+                else: rest.append(req)
+            self._pending = rest
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None: return
+            batch = [req for req in batch
+                if req[2].set_running_or_notify_cancel()]
+            if not batch: continue
+            ims = [im for im, _, _ in batch]
+            try:
+                detections = self.tfnet.return_predict_arrays(
+                    ims, batch[0][1])
+            except Exception as e:
+                for _, _, future in batch: future.set_exception(e)
+                continue
+            for i, (_, _, future) in enumerate(batch):
+                found = detections.image(i)
+                found.batch_index[:] = 0
+                future.set_result(found)
+
+    def close(self):
+        """serve the requests already queued, then stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
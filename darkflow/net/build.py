@@ -6,6 +6,9 @@ from .ops import op_create, identity
 from .ops import HEADER, LINE
 from .framework import create_framework
 from ..dark.darknet import Darknet
+from ..utils.graph_cache import cache_paths
+from ..utils.cpu import parse_cores, pin_cores
+import threading
 import json
 import os
 
@@ -29,7 +32,11 @@ class TFNet(object):
 	camera = help.camera
 	predict = flow.predict
 	return_predict = flow.return_predict
+	return_predict_batch = flow.return_predict_batch
+	return_predict_arrays = flow.return_predict_arrays
 	to_darknet = help.to_darknet
+	save_graph_cache = help.save_graph_cache
+	compare_precision = help.compare_precision
 	build_train_op = help.build_train_op
 	load_from_ckpt = help.load_from_ckpt
 
@@ -44,6 +51,19 @@ class TFNet(object):
 			FLAGS = newFLAGS
 
 		self.FLAGS = FLAGS
+		self._inputs = threading.local()
+
+		# before any session starts its thread pools
+		if FLAGS.cpuPin:
+			pin_cores(parse_cores(FLAGS.cpuPin))
+
+		# a net built before from the same cfg and weights
+		# is loaded as a const graph instead of rebuilt
+		graph_cache = cache_paths(FLAGS) if darknet is None else None
+		if graph_cache and all(map(os.path.isfile, graph_cache)):
+			FLAGS.pbLoad, FLAGS.metaLoad = graph_cache
+			graph_cache = None
+
 		if self.FLAGS.pbLoad and self.FLAGS.metaLoad:
 			self.say('\nLoading from .pb and .meta')
 			self.graph = tf.Graph()
@@ -55,8 +75,17 @@ class TFNet(object):
 			return
 
 		if darknet is None:	
+			# nets that only ever run inference from .weights are
+			# built all const, with batch-norm folded into the convs;
+			# decided before Darknet resolves and resets FLAGS.load
+			fold = FLAGS.fold and not (FLAGS.train or FLAGS.savepb)
+			fold = fold and (FLAGS.load in (str(), 0) or
+				str(FLAGS.load).endswith('.weights'))
 			darknet = Darknet(FLAGS)
 			self.ntrain = len(darknet.layers)
+			if fold:
+				darknet.fold_batchnorm()
+				self.ntrain = 0
 
 		self.darknet = darknet
 		args = [darknet.meta, FLAGS]
@@ -76,6 +105,7 @@ class TFNet(object):
 				self.setup_meta_ops()
 		self.say('Finished in {}s\n'.format(
 			time.time() - start))
+		if graph_cache: self.save_graph_cache(graph_cache)
 	
 	def build_from_pb(self):
 		with tf.gfile.FastGFile(self.FLAGS.pbLoad, "rb") as f:
@@ -102,14 +132,25 @@ class TFNet(object):
 
 		# Placeholders
 		inp_size = [None] + self.meta['inp_size']
+		# fully convolutional nets take any input size at inference
+		fixed = ['connected', 'select', 'extract', 'flatten', 'local']
+		if not self.FLAGS.train and not any(
+			layer.type in fixed for layer in self.darknet.layers):
+			inp_size[1:3] = [None, None]
 		self.inp = tf.placeholder(tf.float32, inp_size, 'input')
 		self.feed = dict() # other placeholders
 
 		# Build the forward pass
 		state = identity(self.inp)
 		roof = self.num_layer - self.ntrain
+		routed = set()
+		for layer in self.darknet.layers:
+			if layer.type == 'route': routed.update(layer.routes)
 		self.say(HEADER, LINE)
 		for i, layer in enumerate(self.darknet.layers):
+			# dropout does nothing in const (inference) nets
+			if not self.ntrain and layer.type == 'dropout' \
+				and layer.number not in routed: continue
 			scope = '{}-{}'.format(str(i),layer.type)
 			args = [layer, state, i, roof, self.feed]
 			state = op_create(*args)
@@ -136,6 +177,17 @@ class TFNet(object):
 			self.say('Running entirely on CPU')
 			cfg['device_count'] = {'GPU': 0}
 
+		if self.FLAGS.intraOp:
+			cfg['intra_op_parallelism_threads'] = self.FLAGS.intraOp
+		if self.FLAGS.interOp:
+			cfg['inter_op_parallelism_threads'] = self.FLAGS.interOp
+		if self.FLAGS.threadPool:
+			# sessions naming the same pool share its threads
+			cfg['session_inter_op_thread_pool'] = [
+				tf.ThreadPoolOptionProto(
+					num_threads = self.FLAGS.interOp,
+					global_name = self.FLAGS.threadPool)]
+
 		if self.FLAGS.train: self.build_train_op()
 		
 		if self.FLAGS.summary:
@@ -163,14 +215,30 @@ class TFNet(object):
 		flags_pb.verbalise = False
 		
 		flags_pb.train = False
+		suffix, tfnet_float = str(), None
+		if flags_pb.quantize:
+			# int8-compressed export: batch-norm folded in and conv
+			# kernels stored as int8, dequantized when the graph loads
+			folded = darknet_pb.fold_batchnorm()
+			if flags_pb.quantizeCheck:
+				# the folded float32 net, as the baseline of the check;
+				# its constants are copied into its graph right away
+				tfnet_float = TFNet(flags_pb, darknet_pb)
+				tfnet_float.sess = tf.Session(graph = tfnet_float.graph)
+			quantized = darknet_pb.quantize()
+			self.say('Folded {} batch-norms, quantized {} kernels'.format(
+				folded, quantized))
+			suffix = '-int8'
 		# rebuild another tfnet. all const.
 		tfnet_pb = TFNet(flags_pb, darknet_pb)		
 		tfnet_pb.sess = tf.Session(graph = tfnet_pb.graph)
 		# tfnet_pb.predict() # uncomment for unit testing
-		name = 'built_graph/{}.pb'.format(self.meta['name'])
+		if tfnet_float is not None:
+			tfnet_float.compare_precision(tfnet_pb, flags_pb.quantizeCheck)
+		name = 'built_graph/{}{}.pb'.format(self.meta['name'], suffix)
 		os.makedirs(os.path.dirname(name), exist_ok=True)
 		#Save dump of everything in meta
-		with open('built_graph/{}.meta'.format(self.meta['name']), 'w') as fp:
+		with open('built_graph/{}{}.meta'.format(self.meta['name'], suffix), 'w') as fp:
 			json.dump(self.meta, fp)
 		self.say('Saving const graph def to {}'.format(name))
 		graph_def = tfnet_pb.sess.graph_def
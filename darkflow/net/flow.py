@@ -1,8 +1,13 @@
 import os
 import time
 import numpy as np
+import cv2
 import tensorflow as tf
 import pickle
+import queue
+import threading
+import itertools
+import zlib
 from multiprocessing.pool import ThreadPool
 
 train_stats = (
@@ -73,60 +78,187 @@ def train(self):
 
     if ckpt: _save_ckpt(self, *args)
 
-def return_predict(self, im):
+def _input_buffer(self, size, inp_size = None):
+    """
+    Input buffer of the calling thread, holding at least
+    size images of inp_size (by default the one of the
+    cfg); reallocated only when a batch outgrows it
+    """
+    buffers = getattr(self._inputs, 'buffers', None)
+    if buffers is None: buffers = self._inputs.buffers = dict()
+    key = None if inp_size is None else tuple(inp_size)
+    inputs = buffers.get(key)
+    if inputs is None or len(inputs) < size:
+        inputs = self.framework.input_buffer(size, inp_size)
+        buffers[key] = inputs
+    return inputs
+
+def _input_size(self, size):
+    """
+    (h, w, c) net input for a requested size, an int or an
+    (h, w) pair of multiples of the net stride (32 for yolov2),
+    None for the size of the cfg
+    """
+    if size is None: return None
+    if isinstance(size, int): size = (size, size)
+    h, w, c = self.meta['inp_size']
+    assert self.inp.get_shape().as_list()[1] is None, \
+        'The input size of {} is fixed'.format(self.meta['name'])
+    stride = h // self.meta['out_size'][0]
+    assert all(s > 0 and s % stride == 0 for s in size), \
+        'Input size {} is not a multiple of {}'.format(size, stride)
+    return [int(size[0]), int(size[1]), c]
+
+def return_predict_arrays(self, ims, size = None):
+    """
+    Forwards one image, or a list of images in a single
+    sess.run, and returns a Detections holding parallel
+    arrays of xyxy, score, class_id and batch_index.
+    Fully convolutional nets take the images at any size
+    that is a multiple of their stride, see _input_size
+    """
+    if isinstance(ims, np.ndarray) and ims.ndim == 3:
+        ims = [ims]
+    for im in ims:
+        assert isinstance(im, np.ndarray), \
+				'Image is not a np.ndarray'
+    inputs = _input_buffer(self, len(ims), _input_size(self, size))
+    for i, im in enumerate(ims): inputs.put(i, im)
+    feed_dict = {self.inp : inputs.batch(len(ims))}
+
+    out = self.sess.run(self.out, feed_dict)
+    batch_index, boxes, probs = self.framework.findboxes_batch(out)
+    boxes = inputs.unletterbox(batch_index, boxes)
+    shapes = [im.shape[:2] for im in ims]
+    return self.framework.process_boxes(
+        batch_index, boxes, probs, shapes, self.FLAGS.threshold)
+
+def return_predict(self, im, size = None):
     assert isinstance(im, np.ndarray), \
 				'Image is not a np.ndarray'
-    h, w, _ = im.shape
-    im = self.framework.resize_input(im)
-    this_inp = np.expand_dims(im, 0)
-    feed_dict = {self.inp : this_inp}
-
-    out = self.sess.run(self.out, feed_dict)[0]
-    boxes = self.framework.findboxes(out)
-    threshold = self.FLAGS.threshold
-    boxesInfo = list()
-    for box in boxes:
-        tmpBox = self.framework.process_box(box, h, w, threshold)
-        if tmpBox is None:
-            continue
-        boxesInfo.append({
-            "label": tmpBox[4],
-            "confidence": tmpBox[6],
-            "topleft": {
-                "x": tmpBox[0],
-                "y": tmpBox[2]},
-            "bottomright": {
-                "x": tmpBox[1],
-                "y": tmpBox[3]}
-        })
-    return boxesInfo
-
-import math
+    return return_predict_arrays(self, im, size).to_dicts()
+
+def return_predict_batch(self, ims, size = None):
+    """
+    Like return_predict, but forwards a list of images
+    through the net in a single sess.run
+    """
+    detections = return_predict_arrays(self, ims, size)
+    return [detections.image(i).to_dicts() for i in range(len(ims))]
+
+def _scan_inputs(self, inp_path):
+    """
+    Lazily yields the names of the input images in inp_path,
+    only those of this worker's shard when FLAGS.shards > 1
+    """
+    shards, shard = self.FLAGS.shards, self.FLAGS.shard
+    for entry in os.scandir(inp_path):
+        if not self.framework.is_inp(entry.name): continue
+        if not entry.is_file(): continue
+        if shards > 1 and shard >= 0 and \
+            zlib.crc32(entry.name.encode()) % shards != shard: continue
+        yield entry.name
+
+def _progress_path(self, inp_path):
+    """file listing the inputs a predict run has finished"""
+    name = '.predict_progress'
+    if self.FLAGS.shards > 1 and self.FLAGS.shard >= 0:
+        name += '_{}of{}'.format(self.FLAGS.shard, self.FLAGS.shards)
+    return os.path.join(inp_path, 'out', name)
+
+def _prefetch(self, inp_path, batches, size, depth):
+    """
+    Yields (names, images, inputs) for every batch of file
+    names, decoded by a producer thread at most depth batches
+    ahead of the consumer. Input buffers are recycled once the
+    consumer asks for the next batch, which caps the memory.
+    Images that cannot be decoded are left out of their batch.
+    """
+    free = queue.Queue()
+    for _ in range(depth + 1):
+        free.put(self.framework.input_buffer(size))
+    ready = queue.Queue(depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for this_batch in batches:
+                inputs = free.get()
+                if inputs is None or stop.is_set(): return
+                def load(i):
+                    im = cv2.imread(os.path.join(inp_path, this_batch[i]))
+                    if im is not None: inputs.put(i, im)
+                    return im
+                this_imgs = pool.map(load, range(len(this_batch)))
+                keep = [i for i, im in enumerate(this_imgs) if im is not None]
+                if len(keep) < len(this_batch):
+                    for i in set(range(len(this_batch))) - set(keep):
+                        self.say('Skipping {}: cannot decode'.format(this_batch[i]))
+                    this_batch = [this_batch[i] for i in keep]
+                    this_imgs = [this_imgs[i] for i in keep]
+                    for i, im in enumerate(this_imgs): inputs.put(i, im)
+                if not this_batch:
+                    free.put(inputs); continue
+                ready.put((this_batch, this_imgs, inputs))
+            ready.put(None)
+        except Exception as e:
+            ready.put(e)
+
+    producer = threading.Thread(target = produce)
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is None: return
+            if isinstance(item, Exception): raise item
+            yield item
+            free.put(item[2])
+    finally:
+        # unblock the producer if the consumer stopped early
+        stop.set()
+        free.put(None)
+        while not ready.empty(): ready.get_nowait()
 
 def predict(self):
+    """
+    Streams the images of FLAGS.imgdir through the net in
+    batches, without listing the whole directory upfront.
+    Finished inputs are logged, so that a run with --resume
+    skips them; --shards N --shard i restricts the run to
+    the inputs whose name hashes to i.
+    """
     inp_path = self.FLAGS.imgdir
-    all_inps = os.listdir(inp_path)
-    all_inps = [i for i in all_inps if self.framework.is_inp(i)]
-    if not all_inps:
-        msg = 'Failed to find any images in {} .'
-        exit('Error: {}'.format(msg.format(inp_path)))
+    batch = self.FLAGS.batch
 
-    batch = min(self.FLAGS.batch, len(all_inps))
+    done = set()
+    progress_path = _progress_path(self, inp_path)
+    if self.FLAGS.resume and os.path.exists(progress_path):
+        with open(progress_path, 'r') as f:
+            done = set(line.rstrip('\n') for line in f)
+        self.say('Resuming, {} inputs already done'.format(len(done)))
+    progress = open(progress_path, 'a' if self.FLAGS.resume else 'w')
 
-    # predict in batches
-    n_batch = int(math.ceil(len(all_inps) / batch))
-    for j in range(n_batch):
-        from_idx = j * batch
-        to_idx = min(from_idx + batch, len(all_inps))
+    # predict in lazily cut batches, decoding the next ones meanwhile
+    all_inps = (inp for inp in _scan_inputs(self, inp_path)
+        if inp not in done)
+    batches = iter(lambda: list(itertools.islice(all_inps, batch)), [])
+    batches = _prefetch(self, inp_path, batches, batch, self.FLAGS.prefetch)
 
-        # collect images input in the batch
-        this_batch = all_inps[from_idx:to_idx]
-        inp_feed = pool.map(lambda inp: (
-            np.expand_dims(self.framework.preprocess(
-                os.path.join(inp_path, inp)), 0)), this_batch)
+    pending = None
+    total, begin = 0, time.time()
+    def finish(pending):
+        # checkpoint a batch once all its outputs are written
+        rendering, names = pending
+        rendering.get()
+        progress.write(''.join(name + '\n' for name in names))
+        progress.flush()
+
+    for this_batch, this_imgs, inputs in batches:
+        inp_feed = inputs.batch(len(this_batch))
 
         # Feed to the net
-        feed_dict = {self.inp : np.concatenate(inp_feed, 0)}    
+        feed_dict = {self.inp : inp_feed}
         self.say('Forwarding {} inputs ...'.format(len(inp_feed)))
         start = time.time()
         out = self.sess.run(self.out, feed_dict)
@@ -134,15 +266,24 @@ def predict(self):
         self.say('Total time = {}s / {} inps = {} ips'.format(
             last, len(inp_feed), len(inp_feed) / last))
 
-        # Post processing
+        # Post processing: decode the whole batch at once, then
+        # draw and encode on the pool while the next batch runs
         self.say('Post processing {} inputs ...'.format(len(inp_feed)))
-        start = time.time()
-        pool.map(lambda p: (lambda i, prediction:
-            self.framework.postprocess(
-               prediction, os.path.join(inp_path, this_batch[i])))(*p),
-            enumerate(out))
-        stop = time.time(); last = stop - start
+        detections = self.framework.postprocess_batch(
+            out, [im.shape[:2] for im in this_imgs], inputs)
+        jobs = [(detections.image(i), this_imgs[i],
+            os.path.join(inp_path, this_batch[i]))
+            for i in range(len(this_batch))]
+        if pending is not None: finish(pending)
+        pending = (pool.map_async(
+            lambda job: self.framework.render(*job), jobs), this_batch)
+        total += len(this_batch)
 
-        # Timing
-        self.say('Total time = {}s / {} inps = {} ips'.format(
-            last, len(inp_feed), len(inp_feed) / last))
+    if pending is not None: finish(pending)
+    progress.close()
+    if not total and not done:
+        msg = 'Failed to find any images in {} .'
+        exit('Error: {}'.format(msg.format(inp_path)))
+    last = time.time() - begin
+    self.say('Total time = {}s / {} inps = {} ips'.format(
+        last, total, total / max(last, 1e-9)))
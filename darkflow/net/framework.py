@@ -23,13 +23,18 @@ class YOLO(framework):
     shuffle = yolo.data.shuffle
     preprocess = yolo.predict.preprocess
     postprocess = yolo.predict.postprocess
+    postprocess_batch = yolo.predict.postprocess_batch
+    render = yolo.predict.render
     loss = yolo.train.loss
     is_inp = yolo.misc.is_inp
     profile = yolo.misc.profile
     _batch = yolo.data._batch
     resize_input = yolo.predict.resize_input
+    input_buffer = yolo.predict.input_buffer
     findboxes = yolo.predict.findboxes
+    findboxes_batch = yolo.predict.findboxes_batch
     process_box = yolo.predict.process_box
+    process_boxes = yolo.predict.process_boxes
 
 class YOLOv2(framework):
     constructor = yolo.constructor
@@ -38,11 +43,16 @@ class YOLOv2(framework):
     preprocess = yolo.predict.preprocess
     loss = yolov2.train.loss
     is_inp = yolo.misc.is_inp
-    postprocess = yolov2.predict.postprocess
+    postprocess = yolo.predict.postprocess
+    postprocess_batch = yolov2.predict.postprocess_batch
+    render = yolo.predict.render
     _batch = yolov2.data._batch
     resize_input = yolo.predict.resize_input
+    input_buffer = yolo.predict.input_buffer
     findboxes = yolov2.predict.findboxes
+    findboxes_batch = yolov2.predict.findboxes_batch
     process_box = yolo.predict.process_box
+    process_boxes = yolo.predict.process_boxes
 
 """
 framework factory
@@ -2,10 +2,15 @@
 tfnet secondary (helper) methods
 """
 from ..utils.loader import create_loader
+from ..utils.video import LatestFrame, AsyncVideoWriter
+from ..utils.process import cfg_parsed
 from time import time as timer
 import tensorflow as tf
 import numpy as np
 import sys
+import json
+import queue
+import threading
 import cv2
 import os
 
@@ -68,12 +73,15 @@ def _get_fps(self, frame):
 def camera(self):
     file = self.FLAGS.demo
     SaveVideo = self.FLAGS.saveVideo
+    headless = self.FLAGS.headless
     
     if file == 'camera':
         file = 0
     else:
         assert os.path.isfile(file), \
         'file {} does not exist'.format(file)
+    assert not (headless and file == 0), \
+    'headless mode benchmarks video files only'
         
     camera = cv2.VideoCapture(file)
     
@@ -83,14 +91,11 @@ def camera(self):
     assert camera.isOpened(), \
     'Cannot capture source'
     
+    _, frame = camera.read()
+    height, width, _ = frame.shape
     if file == 0:#camera window
         cv2.namedWindow('', 0)
-        _, frame = camera.read()
-        height, width, _ = frame.shape
         cv2.resizeWindow('', width, height)
-    else:
-        _, frame = camera.read()
-        height, width, _ = frame.shape
 
     if SaveVideo:
         fourcc = cv2.VideoWriter_fourcc(*'XVID')
@@ -102,56 +107,188 @@ def camera(self):
             fps = round(camera.get(cv2.CAP_PROP_FPS))
         videoWriter = cv2.VideoWriter(
             'video.avi', fourcc, fps, (width, height))
+        # encode on its own thread, off the display loop
+        videoWriter = AsyncVideoWriter(videoWriter,
+            self.FLAGS.videoQueue, self.FLAGS.videoPolicy)
 
-    # buffers for demo in batch
-    buffer_inp = list()
-    buffer_pre = list()
-    
+    # capture, inference and display run as three concurrent
+    # stages; a live source drops stale frames, a file does not
+    batch = self.FLAGS.queue
+    frames = LatestFrame() if file == 0 else queue.Queue(2 * batch)
+    results = queue.Queue(2)
+    stop = threading.Event()
+
+    def deliver(item):
+        if file == 0: # LatestFrame never blocks
+            frames.put(item); return
+        # the queue of a file is bounded: give up once stopped,
+        # as the infer stage may have died with frames queued
+        while not stop.is_set():
+            try: frames.put(item, timeout = .1); return
+            except queue.Full: continue
+
+    def capture(frame):
+        while frame is not None and not stop.is_set():
+            deliver(frame)
+            _, frame = camera.read()
+        deliver(None)
+
+    def infer():
+        try:
+            inputs = self.framework.input_buffer(batch)
+            ended = False
+            while not ended:
+                buffer_inp = list()
+                while len(buffer_inp) < batch:
+                    frame = frames.get()
+                    if frame is None:
+                        ended = True; break
+                    inputs.put(len(buffer_inp), frame)
+                    buffer_inp.append(frame)
+                if not buffer_inp: break
+                feed_dict = {self.inp: inputs.batch(len(buffer_inp))}
+                net_out = self.sess.run(self.out, feed_dict)
+                detections = self.framework.postprocess_batch(
+                    net_out, [img.shape[:2] for img in buffer_inp], inputs)
+                results.put((buffer_inp, detections))
+            results.put(None)
+        except Exception as e:
+            results.put(e)
+
+    stages = [threading.Thread(target = capture, args = (frame,)),
+              threading.Thread(target = infer)]
+    for stage in stages:
+        stage.daemon = True
+        stage.start()
+
+    # display on this thread, as highgui wants the main thread
     elapsed = int()
     start = timer()
-    self.say('Press [ESC] to quit demo')
-    # Loop through frames
-    while camera.isOpened():
-        elapsed += 1
-        _, frame = camera.read()
-        if frame is None:
-            print ('\nEnd of Video')
-            break
-        preprocessed = self.framework.preprocess(frame)
-        buffer_inp.append(frame)
-        buffer_pre.append(preprocessed)
-        
-        # Only process and imshow when queue is full
-        if elapsed % self.FLAGS.queue == 0:
-            feed_dict = {self.inp: buffer_pre}
-            net_out = self.sess.run(self.out, feed_dict)
-            for img, single_out in zip(buffer_inp, net_out):
-                postprocessed = self.framework.postprocess(
-                    single_out, img, False)
+    try:
+        while True:
+            item = results.get()
+            if item is None:
+                print ('\nEnd of Video')
+                break
+            if isinstance(item, Exception): raise item
+            buffer_inp, detections = item
+            for i, img in enumerate(buffer_inp):
+                elapsed += 1
+                if headless and not SaveVideo: continue
+                postprocessed = self.framework.render(
+                    detections.image(i), img, save = False)
                 if SaveVideo:
                     videoWriter.write(postprocessed)
                 if file == 0: #camera window
                     cv2.imshow('', postprocessed)
-            # Clear Buffers
-            buffer_inp = list()
-            buffer_pre = list()
 
-        if elapsed % 5 == 0:
+            # end-to-end throughput, from capture to display
             sys.stdout.write('\r')
             sys.stdout.write('{0:3.3f} FPS'.format(
                 elapsed / (timer() - start)))
             sys.stdout.flush()
-        if file == 0: #camera window
-            choice = cv2.waitKey(1)
-            if choice == 27: break
+            if file == 0: #camera window
+                choice = cv2.waitKey(1)
+                if choice == 27: break
+    finally:
+        stop.set()
+        stages[0].join()
+        sys.stdout.write('\n')
+        if SaveVideo: # flush the frames still queued
+            videoWriter.release()
+            if videoWriter.dropped:
+                self.say('{} frames not recorded'.format(
+                    videoWriter.dropped))
+        camera.release()
 
-    sys.stdout.write('\n')
-    if SaveVideo:
-        videoWriter.release()
-    camera.release()
-    if file == 0: #camera window
+    if file == 0:
+        self.say('{} stale frames dropped'.format(frames.dropped))
         cv2.destroyAllWindows()
 
+def save_graph_cache(self, paths):
+    """
+    Freeze the graph with its loaded weights, as savepb
+    does, and store it with meta at the given (.pb, .meta)
+    """
+    name, meta_name = paths
+    os.makedirs(os.path.dirname(os.path.abspath(name)), exist_ok = True)
+    graph_def = tf.graph_util.convert_variables_to_constants(
+        self.sess, self.graph.as_graph_def(), ['output'])
+
+    # the cache outlives this run: store meta as the cfg has it,
+    # not with this run's --threshold and nms options, which the
+    # framework constructor applies again on every load
+    meta = dict(self.meta)
+    for key in ['nms_iou', 'nms_agnostic', 'nms_top_k']:
+        meta.pop(key, None)
+    cfg_meta = cfg_parsed(self.FLAGS.model,
+        self.FLAGS.binary, self.FLAGS.cfgCache)[0]
+    if 'thresh' in cfg_meta: meta['thresh'] = cfg_meta['thresh']
+    else: meta.pop('thresh', None)
+
+    # write to temporary files first, the .pb last, so that
+    # a concurrent or interrupted run never sees half a cache
+    with open(meta_name + '.tmp', 'w') as fp:
+        json.dump(meta, fp)
+    os.replace(meta_name + '.tmp', meta_name)
+    with open(name + '.tmp', 'wb') as fp:
+        fp.write(graph_def.SerializeToString())
+    os.replace(name + '.tmp', name)
+    self.say('Cached const graph def to {}'.format(name))
+
+def _box_iou(a, b):
+    """IoU of every xyxy box of a with every box of b"""
+    a, b = a.astype(np.float64), b.astype(np.float64)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis = 2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis = 1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis = 1)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-9)
+
+def compare_precision(self, other, imgdir):
+    """
+    Run this net and other, a reduced precision copy of it,
+    on the images of imgdir and report how far apart they
+    are: the largest difference of their raw outputs, and
+    the share of this net's boxes that other finds too
+    (same class and an IoU of at least .5), along with the
+    size of their graph defs and their forward times
+    """
+    names = sorted(name for name in os.listdir(imgdir)
+        if self.framework.is_inp(name))
+    if not names:
+        self.say('No images in {} to check precision'.format(imgdir))
+        return
+    diff, found, total = 0., 0, 0
+    elapsed = [0., 0.]
+    for name in names:
+        im = cv2.imread(os.path.join(imgdir, name))
+        if im is None: continue
+        inp = self.framework.resize_input(im)[None]
+        outs = list()
+        for i, net in enumerate([self, other]):
+            start = timer()
+            outs.append(net.sess.run(net.out, {net.inp: inp}))
+            elapsed[i] += timer() - start
+        diff = max(diff, float(np.abs(outs[0] - outs[1]).max()))
+
+        ref, low = [net.return_predict_arrays(im) for net in [self, other]]
+        total += len(ref)
+        if not len(ref) or not len(low): continue
+        match = _box_iou(ref.xyxy, low.xyxy) >= .5
+        match &= ref.class_id[:, None] == low.class_id[None, :]
+        found += int(match.any(axis = 1).sum())
+
+    print('Precision check on {} images of {}'.format(len(names), imgdir))
+    print('  max output difference {:.5f}'.format(diff))
+    print('  boxes kept {} / {}'.format(found, total))
+    sizes = [net.graph.as_graph_def().ByteSize() / 2. ** 20
+        for net in [self, other]]
+    print('  graph def {:.1f} MB -> {:.1f} MB'.format(*sizes))
+    print('  forward time {:.3f}s -> {:.3f}s'.format(*elapsed))
+
 def to_darknet(self):
     darknet_ckpt = self.darknet
 
@@ -67,12 +67,22 @@ class convolutional(BaseOp):
     def forward(self):
         pad = [[self.lay.pad, self.lay.pad]] * 2;
         temp = tf.pad(self.inp.out, [[0, 0]] + pad + [[0, 0]])
-        temp = tf.nn.conv2d(temp, self.lay.w['kernel'], padding = 'VALID', 
+        temp = tf.nn.conv2d(temp, self.kernel(), padding = 'VALID', 
             name = self.scope, strides = [1] + [self.lay.stride] * 2 + [1])
         if self.lay.batch_norm: 
             temp = self.batchnorm(self.lay, temp)
         self.out = tf.nn.bias_add(temp, self.lay.w['biases'])
 
+    def kernel(self):
+        kernel = self.lay.w['kernel']
+        scale = self.lay.w.get('kernel_scale')
+        if scale is None: return kernel
+        # int8 constant in the graph def, see Darknet.quantize;
+        # grappler folds this dequantize into a float32 constant
+        # when the graph loads, so only the export is compressed
+        kernel = tf.cast(kernel, tf.float32)
+        return kernel * scale
+
     def batchnorm(self, layer, inp):
         if not self.var:
             temp = (inp - layer.w['moving_mean'])
@@ -118,6 +118,11 @@ class maxpool(BaseOp):
 
 class leaky(BaseOp):
 	def forward(self):
+		if hasattr(tf.nn, 'leaky_relu'):
+			# one op, that grappler can fuse with conv and bias
+			self.out = tf.nn.leaky_relu(
+				self.inp.out, .1, name = self.scope)
+			return
 		self.out = tf.maximum(
 			.1 * self.inp.out, 
 			self.inp.out, 
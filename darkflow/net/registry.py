@@ -0,0 +1,70 @@
+from .build import TFNet
+import threading
+
+class ModelRegistry(object):
+    """
+    Several nets (cfg and weights pairs) hosted in one process and
+    addressed by name. Every net is built with the shared options
+    updated by its own, and its session runs ops on the inter-op
+    thread pool named by the shared threadPool option, so the nets
+    share one set of CPU threads (and one GPU allocator) instead of
+    each sizing its own for the whole machine.
+
+    Nets are built on first use, so a registry can list models that
+    a run may never need.
+    """
+    POOL = 'darkflow'
+
+    def __init__(self, models = None, **shared):
+        self.shared = dict(shared)
+        self.shared.setdefault('threadPool', self.POOL)
+        self._options = dict()
+        self._nets = dict()
+        self._lock = threading.Lock()
+        for name, options in (models or dict()).items():
+            self.add(name, options)
+
+    def __contains__(self, name):
+        return name in self._options
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    @property
+    def names(self):
+        return list(self._options)
+
+    def add(self, name, options):
+        """register a net built from the TFNet options dict options"""
+        with self._lock:
+            assert name not in self._options, \
+                'Model {} is already registered'.format(name)
+            merged = dict(self.shared)
+            merged.update(options)
+            self._options[name] = merged
+
+    def get(self, name):
+        """the TFNet registered as name, built on first call"""
+        net = self._nets.get(name)
+        if net is not None: return net
+        assert name in self._options, \
+            'Unknown model {}, registered: {}'.format(name, self.names)
+        # a net first requested from several threads is built once
+        with self._lock:
+            net = self._nets.get(name)
+            if net is None:
+                net = TFNet(dict(self._options[name]))
+                self._nets[name] = net
+        return net
+
+    def loaded(self, name):
+        return name in self._nets
+
+    def return_predict(self, name, im):
+        return self.get(name).return_predict(im)
+
+    def return_predict_batch(self, name, ims):
+        return self.get(name).return_predict_batch(ims)
+
+    def return_predict_arrays(self, name, ims):
+        return self.get(name).return_predict_arrays(ims)
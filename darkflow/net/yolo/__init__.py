@@ -3,6 +3,7 @@ from . import predict
 from . import data
 from . import misc
 import numpy as np
+from ...utils.render import Renderer
 
 
 """ YOLO framework __init__ equivalent"""
@@ -29,9 +30,15 @@ def constructor(self, meta, FLAGS):
 	for x in range(len(meta['labels'])): 
 		colors += [_to_color(x, base)]
 	meta['colors'] = colors
+	self.renderer = Renderer(meta['labels'], colors)
 	self.fetch = list()
 	self.meta, self.FLAGS = meta, FLAGS
 
 	# over-ride the threshold in meta if FLAGS has it.
 	if FLAGS.threshold > 0.0:
-		self.meta['thresh'] = FLAGS.threshold
\ No newline at end of file
+		self.meta['thresh'] = FLAGS.threshold
+
+	# non-maximum suppression settings read by the box constructors
+	self.meta['nms_iou'] = FLAGS.nmsIou
+	self.meta['nms_agnostic'] = FLAGS.nmsAgnostic
+	self.meta['nms_top_k'] = FLAGS.nmsTopK
\ No newline at end of file
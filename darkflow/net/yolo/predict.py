@@ -1,5 +1,6 @@
 from ...utils.im_transform import imcv2_recolor, imcv2_affine_trans
-from ...utils.box import BoundBox, box_iou, prob_compare
+from ...utils.box import BoundBox, Detections, box_iou, prob_compare
+from ...utils.input_buffer import InputBuffer
 import numpy as np
 import cv2
 import os
@@ -16,9 +17,19 @@ def _fix(obj, dims, scale, offs):
 def resize_input(self, im):
 	h, w, c = self.meta['inp_size']
 	imsz = cv2.resize(im, (w, h))
-	imsz = imsz / 255.
-	imsz = imsz[:,:,::-1]
-	return imsz
+	# BGR to RGB and scaling in one float32 pass
+	return np.multiply(imsz[:,:,::-1], np.float32(1. / 255.),
+		dtype = np.float32)
+
+def input_buffer(self, batch, inp_size = None):
+	"""
+	Reusable float32 batch of net inputs of inp_size (by
+	default the one of the cfg), letterboxed when
+	FLAGS.letterbox is set
+	"""
+	if inp_size is None: inp_size = self.meta['inp_size']
+	return InputBuffer(inp_size, batch,
+		letterbox = bool(self.FLAGS.letterbox))
 
 def process_box(self, b, h, w, threshold):
 	max_indx = np.argmax(b.probs)
@@ -46,6 +57,50 @@ def findboxes(self, net_out):
 	
 	return boxes
 
+def findboxes_batch(self, net_out):
+	"""
+	Find the boxes of every image in a batched net output,
+	returns parallel (batch_index, boxes, probs) arrays where
+	boxes holds (x, y, w, h) relative to the image size
+	"""
+	batch_index, boxes, probs = list(), list(), list()
+	for i, single_out in enumerate(net_out):
+		found = self.findboxes(single_out)
+		batch_index += [i] * len(found)
+		boxes += [[b.x, b.y, b.w, b.h] for b in found]
+		probs += [b.probs for b in found]
+	C = self.meta['classes']
+	return (np.array(batch_index, dtype = np.intp),
+		np.array(boxes, dtype = np.float32).reshape([-1, 4]),
+		np.array(probs, dtype = np.float32).reshape([-1, C]))
+
+def process_boxes(self, batch_index, boxes, probs, shapes, threshold):
+	"""
+	Vectorized process_box: keeps the rows whose best class
+	scores above threshold and converts them to pixel corners
+	of their image, whose (h, w) is looked up in shapes.
+	Returns a Detections.
+	"""
+	class_id = probs.argmax(axis = 1) if len(probs) else \
+		np.zeros(0, dtype = np.intp)
+	score = probs[np.arange(len(probs)), class_id]
+	keep = score > threshold
+	batch_index, boxes = batch_index[keep], boxes[keep]
+	class_id, score = class_id[keep], score[keep]
+
+	hw = np.asarray(shapes, dtype = np.float64).reshape([-1, 2])
+	h, w = hw[batch_index, 0], hw[batch_index, 1]
+	x, y = boxes[:, 0].astype(np.float64), boxes[:, 1].astype(np.float64)
+	half_w = boxes[:, 2].astype(np.float64) / 2.
+	half_h = boxes[:, 3].astype(np.float64) / 2.
+	left  = np.maximum(np.trunc((x - half_w) * w), 0)
+	right = np.minimum(np.trunc((x + half_w) * w), w - 1)
+	top   = np.maximum(np.trunc((y - half_h) * h), 0)
+	bot   = np.minimum(np.trunc((y + half_h) * h), h - 1)
+	xyxy = np.stack([left, top, right, bot], axis = 1)
+	return Detections(xyxy, score, class_id,
+		batch_index, self.meta['labels'])
+
 def preprocess(self, im, allobj = None):
 	"""
 	Takes an image, return it as a numpy tensor that is readily
@@ -74,40 +129,29 @@ def preprocess(self, im, allobj = None):
 	if allobj is None: return im
 	return im#, np.array(im) # for unit testing
 
-def postprocess(self, net_out, im, save = True):
+def postprocess_batch(self, net_out, shapes, inputs = None):
 	"""
-	Takes net output, draw predictions, save to disk
+	Decodes a whole batched net output at once, returns
+	a Detections over the batch; shapes holds the (h, w)
+	of each source image and inputs the InputBuffer the
+	batch was fed from, to undo its letterboxing
 	"""
-	meta, FLAGS = self.meta, self.FLAGS
-	threshold = FLAGS.threshold
-	colors, labels = meta['colors'], meta['labels']
-
-	boxes = self.findboxes(net_out)
-
-	if type(im) is not np.ndarray:
-		imgcv = cv2.imread(im)
-	else: imgcv = im
-
-	h, w, _ = imgcv.shape
-	resultsForJSON = []
-	for b in boxes:
-		boxResults = self.process_box(b, h, w, threshold)
-		if boxResults is None:
-			continue
-		left, right, top, bot, mess, max_indx, confidence = boxResults
-		thick = int((h + w) // 300)
-		if self.FLAGS.json:
-			resultsForJSON.append({"label": mess, "confidence": float('%.2f' % confidence), "topleft": {"x": left, "y": top}, "bottomright": {"x": right, "y": bot}})
-			continue
-
-		cv2.rectangle(imgcv,
-			(left, top), (right, bot),
-			self.meta['colors'][max_indx], thick)
-		cv2.putText(
-			imgcv, mess, (left, top - 12),
-			0, 1e-3 * h, self.meta['colors'][max_indx],
-			thick // 3)
+	batch_index, boxes, probs = self.findboxes_batch(net_out)
+	if inputs is not None:
+		boxes = inputs.unletterbox(batch_index, boxes)
+	return self.process_boxes(batch_index, boxes, probs,
+		shapes, self.FLAGS.threshold)
 
+def render(self, detections, imgcv, im = None, save = True):
+	"""
+	Takes the detections of one image, draw them onto imgcv,
+	save to disk next to the input image im
+	"""
+	if self.FLAGS.json:
+		resultsForJSON = detections.to_dicts()
+		for result in resultsForJSON:
+			result['confidence'] = float('%.2f' % result['confidence'])
+	else: self.renderer.draw(imgcv, detections)
 
 	if not save: return imgcv
 
@@ -118,6 +162,17 @@ def postprocess(self, net_out, im, save = True):
 		textFile = os.path.splitext(img_name)[0] + ".json"
 		with open(textFile, 'w') as f:
 			f.write(textJSON)
-		return	
+		return
 
 	cv2.imwrite(img_name, imgcv)
+
+def postprocess(self, net_out, im, save = True):
+	"""
+	Takes net output, draw predictions, save to disk
+	"""
+	if type(im) is not np.ndarray:
+		imgcv = cv2.imread(im)
+	else: imgcv = im
+
+	detections = self.postprocess_batch(net_out[None], [imgcv.shape[:2]])
+	return self.render(detections, imgcv, im, save)
@@ -1,13 +1,9 @@
 import numpy as np
-import math
-import cv2
-import os
-import json
 #from scipy.special import expit
 #from utils.box import BoundBox, box_iou, prob_compare
 #from utils.box import prob_compare2, box_intersection
 from ...utils.box import BoundBox
-from ...cython_utils.cy_yolo2_findboxes import box_constructor
+from ...cython_utils.nms import nms_keep
 
 def expit(x):
 	return 1. / (1. + np.exp(-x))
@@ -17,55 +13,88 @@ def _softmax(x):
     out = e_x / e_x.sum()
     return out
 
-def findboxes(self, net_out):
-	# meta
-	meta = self.meta
-	boxes = list()
-	boxes=box_constructor(meta,net_out)
-	return boxes
-
-def postprocess(self, net_out, im, save = True):
+def decode_batch(meta, net_out):
 	"""
-	Takes net output, draw net_out, save to disk
+	Decode a whole (batch, H, W, B * (5 + C)) region output at once.
+	Every class score is softmax * objectness <= objectness, so
+	cells whose objectness logit cannot clear meta['thresh'] are
+	masked out first, on the raw logits, and sigmoid / exp / softmax
+	are only evaluated for the surviving cells.
+	Returns (batch_index, boxes, probs): for each survivor, the index
+	of its image, its (x, y, w, h, objectness) relative to the image
+	and its per-class scores, zeroed where below the threshold.
 	"""
-	boxes = self.findboxes(net_out)
-
-	# meta
-	meta = self.meta
+	batch, H, W, _ = net_out.shape
+	B, C = meta['num'], meta['classes']
 	threshold = meta['thresh']
-	colors = meta['colors']
-	labels = meta['labels']
-	if type(im) is not np.ndarray:
-		imgcv = cv2.imread(im)
-	else: imgcv = im
-	h, w, _ = imgcv.shape
-	
-	resultsForJSON = []
-	for b in boxes:
-		boxResults = self.process_box(b, h, w, threshold)
-		if boxResults is None:
-			continue
-		left, right, top, bot, mess, max_indx, confidence = boxResults
-		thick = int((h + w) // 300)
-		if self.FLAGS.json:
-			resultsForJSON.append({"label": mess, "confidence": float('%.2f' % confidence), "topleft": {"x": left, "y": top}, "bottomright": {"x": right, "y": bot}})
-			continue
+	net_out = net_out.reshape([batch, H, W, B, 5 + C])
+
+	# objectness prefilter: sigmoid(t) > threshold <=> t > logit(threshold)
+	if threshold <= 0.: mask = np.ones(net_out.shape[:4], dtype = bool)
+	elif threshold >= 1.: mask = np.zeros(net_out.shape[:4], dtype = bool)
+	else: mask = net_out[..., 4] > np.log(threshold / (1. - threshold))
+	n, row, col, anchor = np.nonzero(mask)
+	cells = net_out[n, row, col, anchor].astype(np.float32)
 
-		cv2.rectangle(imgcv,
-			(left, top), (right, bot),
-			colors[max_indx], thick)
-		cv2.putText(imgcv, mess, (left, top - 12),
-			0, 1e-3 * h, colors[max_indx],thick//3)
+	anchors = np.asarray(meta['anchors'], dtype = np.float32).reshape([B, 2])
+	boxes = np.empty([len(cells), 5], dtype = np.float32)
+	boxes[:, 0] = (col + expit(cells[:, 0])) / W
+	boxes[:, 1] = (row + expit(cells[:, 1])) / H
+	boxes[:, 2] = np.exp(cells[:, 2]) * anchors[anchor, 0] / W
+	boxes[:, 3] = np.exp(cells[:, 3]) * anchors[anchor, 1] / H
+	boxes[:, 4] = expit(cells[:, 4])
 
-	if not save: return imgcv
+	classes = cells[:, 5:]
+	classes = np.exp(classes - classes.max(axis = 1, keepdims = True))
+	probs = classes * (boxes[:, 4:5] / classes.sum(axis = 1, keepdims = True))
+	probs[probs <= threshold] = 0.
 
-	outfolder = os.path.join(self.FLAGS.imgdir, 'out')
-	img_name = os.path.join(outfolder, os.path.basename(im))
-	if self.FLAGS.json:
-		textJSON = json.dumps(resultsForJSON)
-		textFile = os.path.splitext(img_name)[0] + ".json"
-		with open(textFile, 'w') as f:
-			f.write(textJSON)
-		return
+	live = probs.any(axis = 1)
+	return n[live], boxes[live], probs[live]
 
-	cv2.imwrite(img_name, imgcv)
+def findboxes_batch(self, net_out):
+	"""
+	Decode a whole batched net output and suppress overlaps
+	image by image, returns parallel (batch_index, boxes, probs)
+	arrays where boxes holds (x, y, w, h) relative to the image
+	"""
+	meta = self.meta
+	batch_index, boxes, probs = decode_batch(meta, net_out)
+	nms_args = [meta.get('nms_iou', 0.4),
+		meta.get('nms_agnostic', False), meta.get('nms_top_k', 0)]
+
+	# rows are ordered by batch_index, so each image is a slice
+	bounds = np.searchsorted(batch_index, np.arange(len(net_out) + 1))
+	kept = list()
+	for i in range(len(net_out)):
+		start, stop = bounds[i], bounds[i + 1]
+		if start == stop: continue
+		img_probs = np.ascontiguousarray(probs[start:stop])
+		keep = nms_keep(img_probs, boxes[start:stop], *nms_args)
+		probs[start:stop] = img_probs
+		kept.append(start + np.asarray(keep, dtype = np.intp))
+	kept = np.concatenate(kept) if kept else np.zeros(0, dtype = np.intp)
+	return batch_index[kept], boxes[kept, :4], probs[kept]
+
+def findboxes(self, net_out):
+	_, boxes, probs = findboxes_batch(self, net_out[None])
+	result = list()
+	for box, prob in zip(boxes, probs):
+		bb = BoundBox(self.meta['classes'])
+		bb.x, bb.y, bb.w, bb.h = box
+		bb.probs = prob
+		result.append(bb)
+	return result
+
+def postprocess_batch(self, net_out, shapes, inputs = None):
+	"""
+	Decodes a whole batched net output at once, returns
+	a Detections over the batch; shapes holds the (h, w)
+	of each source image and inputs the InputBuffer the
+	batch was fed from, to undo its letterboxing
+	"""
+	batch_index, boxes, probs = self.findboxes_batch(net_out)
+	if inputs is not None:
+		boxes = inputs.unletterbox(batch_index, boxes)
+	return self.process_boxes(batch_index, boxes, probs,
+		shapes, self.meta['thresh'])
@@ -41,4 +41,67 @@ def prob_compare2(boxa, boxb):
     elif(boxa.pi == boxb.pi):
         return 0
     else:
-        return -1
\ No newline at end of file
+        return -1
+
+class Detections(object):
+    """
+    Array-native detection results: parallel arrays with one row per
+    box, holding the (left, top, right, bottom) pixel corners, the
+    score, the class index into `labels` and the index of the image
+    in the batch. The list-of-dicts format of return_predict is only
+    built on demand, by to_dicts().
+    """
+    def __init__(self, xyxy, score, class_id, batch_index, labels):
+        self.xyxy = np.asarray(xyxy, dtype = np.int32).reshape(-1, 4)
+        self.score = np.asarray(score, dtype = np.float32)
+        self.class_id = np.asarray(class_id, dtype = np.intp)
+        self.batch_index = np.asarray(batch_index, dtype = np.intp)
+        self.labels = list(labels)
+
+    def __len__(self):
+        return len(self.score)
+
+    def __getitem__(self, key):
+        """select rows with an index array, a slice or a boolean mask"""
+        return Detections(self.xyxy[key], self.score[key],
+            self.class_id[key], self.batch_index[key], self.labels)
+
+    def image(self, index):
+        """detections of the index-th image of the batch"""
+        return self[self.batch_index == index]
+
+    @property
+    def label(self):
+        """label of every row, as an array of str"""
+        return np.asarray(self.labels, dtype = object)[self.class_id]
+
+    def to_dicts(self):
+        """the list-of-dicts format returned by return_predict"""
+        boxesInfo = list()
+        rows = zip(self.xyxy.tolist(), self.score.tolist(),
+            self.class_id.tolist())
+        for (left, top, right, bot), score, class_id in rows:
+            boxesInfo.append({
+                "label": self.labels[class_id],
+                "confidence": score,
+                "topleft": {
+                    "x": left,
+                    "y": top},
+                "bottomright": {
+                    "x": right,
+                    "y": bot}
+            })
+        return boxesInfo
+
+    @classmethod
+    def from_dicts(cls, boxesInfo, batch_index = 0):
+        """inverse of to_dicts, for results that were stored as dicts"""
+        labels = sorted(set(box['label'] for box in boxesInfo))
+        lookup = dict((label, i) for i, label in enumerate(labels))
+        xyxy = [[box['topleft']['x'], box['topleft']['y'],
+                 box['bottomright']['x'], box['bottomright']['y']]
+                for box in boxesInfo]
+        score = [box['confidence'] for box in boxesInfo]
+        class_id = [lookup[box['label']] for box in boxesInfo]
+        return cls(xyxy, score, class_id,
+            [batch_index] * len(boxesInfo), labels)
@@ -0,0 +1,69 @@
+"""
+CPU core selection for several darkflow processes sharing
+one machine, so that each runs its ops on its own cores
+instead of every process sizing its thread pools for all.
+"""
+import warnings
+import os
+
+def available_cores():
+    """the cores this process is allowed to run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def parse_cores(spec):
+    """'0-3,8' -> [0, 1, 2, 3, 8]"""
+    cores = list()
+    for part in str(spec).split(','):
+        part = part.strip()
+        if not part: continue
+        if '-' in part:
+            first, last = part.split('-')
+            cores += range(int(first), int(last) + 1)
+        else: cores.append(int(part))
+    return sorted(set(cores))
+
+def format_cores(cores):
+    """[0, 1, 2, 3, 8] -> '0-3,8'"""
+    parts = list()
+    for core in sorted(set(cores)):
+        if parts and parts[-1][1] == core - 1:
+            parts[-1][1] = core
+        else: parts.append([core, core])
+    return ','.join(str(a) if a == b else '{}-{}'.format(a, b)
+        for a, b in parts)
+
+def pin_cores(cores):
+    """
+    Restrict this process to cores. Threads started afterwards
+    (tensorflow pools included) inherit the restriction, so this
+    has to run before the session is created.
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        warnings.warn('CPU pinning is not supported on this platform')
+        return
+    os.sched_setaffinity(0, cores)
+
+def partition_cores(workers, cores = None):
+    """
+    Split cores (by default all available ones) into workers
+    contiguous groups as even as possible, and return for each
+    worker the cpuPin, intraOp and interOp options that keep it
+    on its group: one intra-op thread per core, and at most two
+    inter-op threads, since yolo graphs are a single chain of ops.
+    With more workers than cores, workers share cores in turn.
+    """
+    cores = available_cores() if cores is None else sorted(cores)
+    assert workers > 0 and cores, 'Nothing to partition'
+    if workers >= len(cores):
+        groups = [[cores[i % len(cores)]] for i in range(workers)]
+    else:
+        size, extra = divmod(len(cores), workers)
+        groups, start = list(), 0
+        for i in range(workers):
+            end = start + size + (i < extra)
+            groups.append(cores[start : end])
+            start = end
+    return [dict(cpuPin = format_cores(group), intraOp = len(group),
+        interOp = min(len(group), 2)) for group in groups]
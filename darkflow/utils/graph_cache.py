@@ -0,0 +1,81 @@
+"""
+Where frozen graphs of (cfg, weights) pairs are cached, so that
+later TFNet constructions can skip parsing, weight loading and
+graph building and go through the pbLoad / metaLoad path instead.
+"""
+import hashlib
+import os
+
+# bump when the graphs built by darkflow change
+VERSION = 4
+
+def file_digest(path):
+    """SHA-1 of the whole content of a (small) file"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def weights_fingerprint(path, sample = 1 << 20):
+    """
+    Cheap fingerprint of a large weights file: its size and
+    mtime together with a hash of its first and last sample bytes
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha1('{}:{}'.format(
+        stat.st_size, stat.st_mtime_ns).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(sample))
+        f.seek(max(stat.st_size - sample, 0))
+        digest.update(f.read(sample))
+    return digest.hexdigest()
+
+def weights_source(FLAGS):
+    """
+    (cfg, weights) the net would be initialized from, as
+    Darknet.get_weight_src resolves them, or None when it
+    does not come from a .weights file
+    """
+    load = FLAGS.load
+    if load == str() or load == 0:
+        src_bin = os.path.abspath(FLAGS.binary + FLAGS.model + '.weights')
+        if not os.path.isfile(src_bin): return None
+        return FLAGS.model, src_bin
+    if type(load) is int or not os.path.isfile(load): return None
+    if not load.endswith('.weights'): return None
+    name = os.path.splitext(os.path.basename(load))[0]
+    src_cfg = os.path.join(FLAGS.config, name + '.cfg')
+    if not os.path.isfile(src_cfg): src_cfg = FLAGS.model
+    return src_cfg, load
+
+def cache_paths(FLAGS):
+    """
+    (.pb, .meta) paths of the cached graph for FLAGS, or None
+    when the net cannot be cached: training, exporting, or
+    initializing from a checkpoint or from scratch
+    """
+    if not FLAGS.graphCache: return None
+    if FLAGS.train or FLAGS.savepb or FLAGS.pbLoad: return None
+    if not os.path.isfile(FLAGS.model): return None
+    source = weights_source(FLAGS)
+    if source is None: return None
+    src_cfg, src_bin = source
+
+    # folded and unfolded nets build different graphs
+    digest = hashlib.sha1('v{}:fold{}'.format(
+        VERSION, bool(FLAGS.fold)).encode())
+    for cfg in sorted(set([FLAGS.model, src_cfg])):
+        digest.update(file_digest(cfg).encode())
+    digest.update(weights_fingerprint(src_bin).encode())
+    labels = [FLAGS.labels,
+        os.path.join(FLAGS.config, 'coco.names'),
+        os.path.join(FLAGS.config, '9k.names')]
+    for path in labels:
+        if os.path.isfile(path):
+            digest.update(file_digest(path).encode())
+
+    name = os.path.splitext(os.path.basename(FLAGS.model))[0]
+    name = os.path.join(FLAGS.graphCache,
+        '{}-{}'.format(name, digest.hexdigest()[:16]))
+    return name + '.pb', name + '.meta'
@@ -0,0 +1,85 @@
+import numpy as np
+import cv2
+
+class InputBuffer(object):
+    """
+    Preallocated float32 batch of network inputs. Each image is resized
+    into a reusable uint8 slot, then swapped from BGR to RGB and scaled
+    to [0, 1] in a single pass straight into its place in the batch,
+    laid out NHWC (as the tensorflow graph expects) or NCHW.
+
+    With letterbox, the aspect ratio of the image is kept and the
+    borders are filled with grey; unletterbox maps the boxes found on
+    the network input back onto the source image.
+    """
+    PAD = .5
+
+    def __init__(self, inp_size, batch, layout = 'NHWC', letterbox = False):
+        h, w, c = inp_size
+        assert layout in ('NHWC', 'NCHW'), \
+            'Unknown input layout {}'.format(layout)
+        shape = [batch, h, w, c] if layout == 'NHWC' else [batch, c, h, w]
+        self.array = np.empty(shape, dtype = np.float32)
+        self.size = (h, w)
+        self.layout = layout
+        self.letterbox = letterbox
+        # one resize target per slot, so slots can be filled concurrently
+        self._resized = np.empty([batch, h, w, c], dtype = np.uint8)
+        # (scale_x, scale_y, offset_x, offset_y) of the image in each
+        # slot, relative to the input size
+        self.transforms = np.zeros([batch, 4], dtype = np.float32)
+        self.transforms[:, :2] = 1.
+
+    def __len__(self):
+        return len(self.array)
+
+    def put(self, index, im):
+        """resize the BGR image im into slot index"""
+        h, w = self.size
+        dst = self.array[index]
+        if self.layout == 'NCHW':
+            dst = dst.transpose(1, 2, 0)
+
+        if not self.letterbox:
+            src = cv2.resize(im, (w, h), dst = self._resized[index])
+            self.transforms[index] = 1., 1., 0., 0.
+        else:
+            ih, iw = im.shape[:2]
+            scale = min(float(w) / iw, float(h) / ih)
+            nw = max(int(round(iw * scale)), 1)
+            nh = max(int(round(ih * scale)), 1)
+            dx, dy = (w - nw) // 2, (h - nh) // 2
+            src = self._resized[index, :nh, :nw]
+            if (nw, nh) == (w, h):
+                cv2.resize(im, (w, h), dst = self._resized[index])
+            else:
+                src[...] = cv2.resize(im, (nw, nh))
+            # only the borders are padded, the rest is overwritten below
+            dst[:dy] = self.PAD
+            dst[dy + nh:] = self.PAD
+            dst[dy : dy + nh, :dx] = self.PAD
+            dst[dy : dy + nh, dx + nw:] = self.PAD
+            dst = dst[dy : dy + nh, dx : dx + nw]
+            self.transforms[index] = \
+                float(nw) / w, float(nh) / h, float(dx) / w, float(dy) / h
+
+        np.multiply(src[:, :, ::-1], np.float32(1. / 255.),
+            out = dst, dtype = np.float32)
+        return self.array[index]
+
+    def batch(self, size):
+        """the first size slots, ready to be fed to the net"""
+        return self.array[:size]
+
+    def unletterbox(self, batch_index, boxes):
+        """
+        Map (x, y, w, h) boxes relative to the input of slot
+        batch_index onto their source image, in place
+        """
+        if not self.letterbox: return boxes
+        scale_x, scale_y, off_x, off_y = self.transforms[batch_index].T
+        boxes[:, 0] = (boxes[:, 0] - off_x) / scale_x
+        boxes[:, 1] = (boxes[:, 1] - off_y) / scale_y
+        boxes[:, 2] /= scale_x
+        boxes[:, 3] /= scale_y
+        return boxes
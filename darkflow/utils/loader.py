@@ -67,8 +67,7 @@ class weights_loader(loader):
             order = self._W_ORDER[new.type]
             for par in order:
                 if par not in new.wshape: continue
-                val = walker.walk(new.wsize[par])
-                new.w[par] = val
+                new.w[par] = walker.walk(new.wsize[par])
             new.finalize(walker.transpose)
 
         if walker.path is not None:
@@ -105,7 +104,12 @@ def create_loader(path, cfg = None):
     return load_type(path, cfg)
 
 class weights_walker(object):
-    """incremental reader of float32 binary files"""
+    """
+    incremental reader of float32 binary files: the file
+    is mapped once and every tensor is a view into it
+    """
+    HEADER = 16 # major, minor, revision, seen as int32
+
     def __init__(self, path):
         self.eof = False # end of file
         self.path = path  # current pos
@@ -114,29 +118,31 @@ class weights_walker(object):
             return
         else: 
             self.size = os.path.getsize(path)# save the path
-            major, minor, revision, seen = np.memmap(path,
-                shape = (), mode = 'r', offset = 0,
-                dtype = '({})i4,'.format(4))
+            data = np.memmap(path, mode = 'r', dtype = np.uint8)
+            major, minor, revision, seen = \
+                data[:self.HEADER].view(np.int32)
             self.transpose = major > 1000 or minor > 1000
+            n = (self.size - self.HEADER) // 4
+            self.floats = data[self.HEADER : self.HEADER + 4 * n]
+            self.floats = self.floats.view(np.float32)
             # use while training
             # self.offset = 16+44948600-44138056
             
-            self.offset=16
+            self.offset = self.HEADER
             
-    def walk(self, size):
-        if self.eof: return None
-        end_point = self.offset + 4 * size
+    def read(self, offset, size):
+        """size float32 at byte offset, without copy"""
+        end_point = offset + 4 * size
         assert end_point <= self.size, \
         'Over-read {}'.format(self.path)
+        start = (offset - self.HEADER) // 4
+        return self.floats[start : start + size]
 
-        float32_1D_array = np.memmap(
-            self.path, shape = (), mode = 'r', 
-            offset = self.offset,
-            dtype='({})float32,'.format(size)
-        )
-
-        self.offset = end_point
-        if end_point == self.size: 
+    def walk(self, size):
+        if self.eof: return None
+        float32_1D_array = self.read(self.offset, size)
+        self.offset += 4 * size
+        if self.offset == self.size: 
             self.eof = True
         return float32_1D_array
 
@@ -3,17 +3,29 @@ WARNING: spaghetti code.
 """
 
 import numpy as np
+import hashlib
 import pickle
+import copy
+import re
 import os
 
+# bump when what cfg_yielder yields changes, to invalidate cfgCache
+CFG_VERSION = 1
+
+_NUMBER = re.compile(r'[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')
+
+def _value(text):
+	"""a cfg value as int or float when it is a number, else as is"""
+	if _NUMBER.match(text) is None: return text
+	i = float(text)
+	if i == int(i): i = int(i)
+	return i
+
 def parser(model):
 	"""
 	Read the .cfg file to extract layers into `layers`
 	as well as model-specific parameters into `meta`
 	"""
-	def _parse(l, i = 1):
-		return l.split('=')[i].strip()
-
 	with open(model, 'rb') as f:
 		lines = f.readlines()
 
@@ -37,18 +49,9 @@ def parser(model):
 						w = layer['crop_width']
 					layers += [layer]				
 			layer = {'type': line}
-		else:
-			try:
-				i = float(_parse(line))
-				if i == int(i): i = int(i)
-				layer[line.split('=')[0].strip()] = i
-			except:
-				try:
-					key = _parse(line, 0)
-					val = _parse(line, 1)
-					layer[key] = val
-				except:
-					'banana ninja yadayada'
+		elif '=' in line:
+			fields = line.split('=')
+			layer[fields[0].strip()] = _value(fields[1].strip())
 
 	meta.update(layer) # last layer contains meta info
 	if 'anchors' in meta:
@@ -318,4 +321,44 @@ def cfg_yielder(model, binary):
 		d['_size'] = list([h, w, c, l, flat])
 
 	if not flat: meta['out_size'] = [h, w, c]
-	else: meta['out_size'] = l
\ No newline at end of file
+	else: meta['out_size'] = l
+
+# layers whose info depends on profiles read from binary, not only on the cfg
+_PROFILED = ('select', 'conv-extract', 'extract')
+_parsed_cfgs = dict()
+
+def cfg_parsed(model, binary, cache_dir = str()):
+	"""
+	Everything cfg_yielder yields for model, as a list. It is cached in
+	memory by the path, mtime and size of the cfg, and under cache_dir
+	by its content hash, so that later calls skip parsing entirely.
+	Each call returns its own copy, since layers and meta get modified.
+	"""
+	stat = os.stat(model)
+	key = (os.path.abspath(model), model, stat.st_mtime_ns, stat.st_size)
+	parsed = _parsed_cfgs.get(key)
+	if parsed is not None: return copy.deepcopy(parsed)
+
+	path = None
+	if cache_dir:
+		# meta['model'] is the path as given, so it is part of the key
+		digest = hashlib.sha1('v{}:{}:'.format(CFG_VERSION, model).encode())
+		with open(model, 'rb') as f: digest.update(f.read())
+		path = os.path.join(cache_dir, digest.hexdigest() + '.pkl')
+		if os.path.isfile(path):
+			try:
+				with open(path, 'rb') as f: parsed = pickle.load(f)
+			except Exception: parsed = None # unreadable, parse again
+
+	if parsed is None:
+		parsed = list(cfg_yielder(model, binary))
+		if any(info[0] in _PROFILED for info in parsed[1:]):
+			return parsed
+		if path is not None:
+			os.makedirs(cache_dir, exist_ok = True)
+			with open(path + '.tmp', 'wb') as f:
+				pickle.dump(parsed, f, protocol = pickle.HIGHEST_PROTOCOL)
+			os.replace(path + '.tmp', path)
+
+	_parsed_cfgs[key] = parsed
+	return copy.deepcopy(parsed)
@@ -0,0 +1,40 @@
+import numpy as np
+import cv2
+
+class Renderer(object):
+    """
+    Draws Detections onto frames. Everything that depends only on
+    the class (the label text and the color, converted once to the
+    uint8 pixel cv2 writes) or only on the frame size (line
+    thickness and font scale) is computed once, so the per-box work
+    is reduced to one cv2.rectangle and one cv2.putText call over
+    plain ints, both of which rasterize in C.
+    """
+    FONT = 0 # cv2.FONT_HERSHEY_SIMPLEX
+
+    def __init__(self, labels, colors):
+        self.labels = list(labels)
+        self.colors = [self._pixel(color) for color in colors]
+
+    @staticmethod
+    def _pixel(color):
+        """color as cv2 drawing functions write it to a uint8 image"""
+        px = np.zeros([1, 1, 3], dtype = np.uint8)
+        cv2.rectangle(px, (0, 0), (0, 0), color, -1)
+        return tuple(int(c) for c in px[0, 0])
+
+    def draw(self, imgcv, detections):
+        """draw the boxes and labels of detections onto imgcv"""
+        if not len(detections): return imgcv
+        h, w, _ = imgcv.shape
+        thick = int((h + w) // 300)
+        scale = 1e-3 * h
+
+        labels, colors = self.labels, self.colors
+        rows = zip(detections.xyxy.tolist(), detections.class_id.tolist())
+        for (left, top, right, bot), class_id in rows:
+            color = colors[class_id]
+            cv2.rectangle(imgcv, (left, top), (right, bot), color, thick)
+            cv2.putText(imgcv, labels[class_id], (left, top - 12),
+                self.FONT, scale, color, thick // 3)
+        return imgcv
@@ -0,0 +1,70 @@
+import threading
+import queue
+
+class LatestFrame(object):
+    """
+    Single-slot frame queue for live sources: put never blocks
+    and overwrites a frame nobody took yet, so the consumer
+    always gets the most recent one. dropped counts the frames
+    that were overwritten.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame, self._full = None, False
+        self.dropped = 0
+
+    def put(self, frame):
+        with self._cond:
+            if self._full: self.dropped += 1
+            self._frame, self._full = frame, True
+            self._cond.notify()
+
+    def get(self):
+        with self._cond:
+            while not self._full: self._cond.wait()
+            frame, self._frame, self._full = self._frame, None, False
+            return frame
+
+class AsyncVideoWriter(object):
+    """
+    Wraps a cv2.VideoWriter so that frames are encoded on a
+    dedicated thread, through a queue of at most size frames.
+    When the queue is full, policy 'block' makes write wait for
+    the encoder and loses nothing, 'drop' discards the frame
+    and counts it in dropped. release flushes the queued frames
+    before closing the file.
+    """
+    def __init__(self, writer, size = 32, policy = 'block'):
+        assert policy in ('block', 'drop'), \
+            'Unknown video writer policy {}'.format(policy)
+        self.writer = writer
+        self.policy = policy
+        self.dropped = 0
+        self._queue = queue.Queue(size)
+        self._error = None
+        self._thread = threading.Thread(target = self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None: return
+            # keep draining on errors, so write never blocks forever
+            if self._error is not None: continue
+            try: self.writer.write(frame)
+            except Exception as e: self._error = e
+
+    def write(self, frame):
+        if self._error is not None: raise self._error
+        if self.policy == 'block':
+            self._queue.put(frame)
+            return
+        try: self._queue.put_nowait(frame)
+        except queue.Full: self.dropped += 1
+
+    def release(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.writer.release()
+        if self._error is not None: raise self._error
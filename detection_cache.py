@@ -0,0 +1,116 @@
+# detection_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from darkflow.utils.graph_cache import file_digest, weights_fingerprint
+
+class DetectionCache:
+    """
+    An on-disk cache of model predictions, keyed by the content of the input image
+    together with the model configuration, the weights and the detection threshold.
+
+    Records are appended as JSON lines to a file of their own per model and
+    threshold, so that detectors sharing `cache_dir` never rewrite each other's
+    records, and indexed in memory in least-recently-used order. When the number of records exceeds `max_entries`,
+    the least recently used ones are evicted and the file is rewritten compactly.
+    """
+    # Cache file name, completed with a hash of the model key
+    FILE_NAME = 'detections-{}.jsonl'
+
+    # Fraction of `max_entries` kept after an eviction, so that the file is not
+    # rewritten on every insertion once the cache is full
+    EVICTION_TARGET = 0.9
+
+    def __init__(self, cache_dir, model_cfg, model_weights, threshold, max_entries):
+        """
+        Opens (or creates) the cache for one model and threshold.
+
+        Args:
+            cache_dir (str): Directory holding the cache file.
+            model_cfg (str): Path to the model configuration file.
+            model_weights (str): Path to the model weights file.
+            threshold (float): Detection threshold the predictions were made with.
+            max_entries (int): Maximum number of records to keep.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_entries = max_entries
+        self._model_key = '{}:{}:{!r}'.format(
+            file_digest(model_cfg), weights_fingerprint(model_weights), float(threshold)).encode()
+        model_hash = hashlib.sha1(self._model_key).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, self.FILE_NAME.format(model_hash))
+        self._records = OrderedDict()
+        self._stale_lines = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def key(self, image_bytes):
+        """
+        Returns the cache key of an encoded image (e.g. the raw bytes of a JPEG file).
+        """
+        digest = hashlib.sha1(self._model_key)
+        digest.update(image_bytes)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached predictions for `key`, or None on a miss.
+        """
+        with self._lock:
+            predictions = self._records.get(key)
+            if predictions is not None:
+                self._records.move_to_end(key)
+            return predictions
+
+    def put(self, key, predictions):
+        """
+        Stores the predictions for `key`, evicting old records if the cache is full.
+
+        Args:
+            key (str): Key returned by `key()`.
+            predictions (list): Predictions in the format of `TFNet.return_predict`.
+        """
+        line = json.dumps({'key': key, 'predictions': predictions}, default=float)
+        with self._lock:
+            if key in self._records:
+                self._stale_lines += 1
+            self._records[key] = json.loads(line)['predictions']
+            self._records.move_to_end(key)
+            if len(self._records) > self.max_entries:
+                while len(self._records) > int(self.max_entries * self.EVICTION_TARGET):
+                    self._records.popitem(last=False)
+                self._compact()
+            else:
+                with open(self.path, 'a') as f:
+                    f.write(line + '\n')
+
+    def _load(self):
+        """Reads the cache file into memory, later lines overriding earlier ones."""
+        if not os.path.exists(self.path):
+            return
+        lines = 0
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # ignore a line truncated by an interrupted write
+                lines += 1
+                self._records[record['key']] = record['predictions']
+                self._records.move_to_end(record['key'])
+        self._stale_lines = lines - len(self._records)
+        if len(self._records) > self.max_entries or self._stale_lines > len(self._records):
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+            self._compact()
+
+    def _compact(self):
+        """Rewrites the cache file with one line per live record, in LRU order."""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            for key, predictions in self._records.items():
+                f.write(json.dumps({'key': key, 'predictions': predictions}) + '\n')
+        os.replace(temp_path, self.path)
+        self._stale_lines = 0
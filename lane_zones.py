@@ -0,0 +1,90 @@
+# lane_zones.py
+
+import cv2
+import numpy as np
+import config
+
+class LaneZoneIndex:
+    """
+    Assigns image points to lanes using arbitrary polygonal lane zones.
+    Each set of polygons is rasterized once per camera resolution into a
+    label mask, so assigning any number of points is a single array lookup.
+    """
+    # Label used in the mask for pixels that belong to no lane
+    UNASSIGNED = -1
+
+    def __init__(self, zones=None):
+        """
+        Initializes the index from a mapping of lane names to polygons.
+
+        Args:
+            zones (dict, optional): Lane name -> list of (x, y) vertices given as
+                                    fractions of the image size. Defaults to
+                                    `config.LANE_ZONES`.
+        """
+        if zones is None:
+            zones = config.LANE_ZONES
+        self.lanes = list(zones)
+        self._polygons = [np.asarray(zones[lane], dtype=np.float64) for lane in self.lanes]
+        # Rasterized label masks, keyed by (width, height)
+        self._masks = {}
+
+    def mask(self, width, height):
+        """
+        Returns the lane label mask for the given resolution, building it on first use.
+
+        Args:
+            width (int): Image width in pixels.
+            height (int): Image height in pixels.
+
+        Returns:
+            np.ndarray: An (height, width) int8 array holding the lane index of each
+                        pixel, or `UNASSIGNED` outside every zone.
+        """
+        key = (width, height)
+        label_mask = self._masks.get(key)
+        if label_mask is None:
+            label_mask = np.full((height, width), self.UNASSIGNED, dtype=np.int8)
+            scale = np.array([width, height], dtype=np.float64)
+            # Paint in reverse so that earlier zones win where polygons overlap
+            for index in reversed(range(len(self.lanes))):
+                vertices = np.round(self._polygons[index] * scale).astype(np.int32)
+                cv2.fillPoly(label_mask, [vertices], index)
+            self._masks[key] = label_mask
+        return label_mask
+
+    def assign(self, points, width, height):
+        """
+        Looks up the lane of each point.
+
+        Args:
+            points (np.ndarray): An (N, 2) array of (x, y) pixel coordinates.
+            width (int): Image width in pixels.
+            height (int): Image height in pixels.
+
+        Returns:
+            np.ndarray: An (N,) array of lane indices into `self.lanes`, with
+                        `UNASSIGNED` for points outside every zone.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        label_mask = self.mask(width, height)
+        cols = np.clip(points[:, 0].astype(np.intp), 0, width - 1)
+        rows = np.clip(points[:, 1].astype(np.intp), 0, height - 1)
+        return label_mask[rows, cols].astype(np.intp)
+
+    def count(self, points, width, height):
+        """
+        Counts how many points fall into each lane.
+
+        Args:
+            points (np.ndarray): An (N, 2) array of (x, y) pixel coordinates.
+            width (int): Image width in pixels.
+            height (int): Image height in pixels.
+
+        Returns:
+            dict: Lane name -> number of points inside that lane's zone.
+        """
+        lane_ids = self.assign(points, width, height)
+        lane_ids = lane_ids[lane_ids != self.UNASSIGNED]
+        counts = np.bincount(lane_ids, minlength=len(self.lanes))
+        return dict(zip(self.lanes, counts.tolist()))
@@ -4,7 +4,9 @@ import argparse
 import json
 import os
 import sys
+import numpy as np
 from vehicle_detector import VehicleDetector
+from cascade_detector import CascadeDetector
 from traffic_manager import TrafficManager
 from simulation_gui import SimulationGUI
 from arduino import ArduinoConnector
@@ -29,9 +31,17 @@ def main():
         default=os.path.join('test_images', '1.jpg'),
         help="Path to the intersection image for vehicle detection."
     )
+    parser.add_argument(
+        '--cascade',
+        action='store_true',
+        help="Detect with the small model first, using the full model only on ambiguous images."
+    )
     args = parser.parse_args()
 
-    vehicle_counts = {'right': 10, 'left': 10, 'up': 10, 'down': 10} # Default counts
+    # Default counts: 10 vehicles of random classes in every lane
+    num_classes = len(config.VEHICLE_CLASSES)
+    picks = np.random.randint(num_classes, size=(len(config.LANE_ZONES), 10))
+    class_counts = np.stack([np.bincount(lane, minlength=num_classes) for lane in picks])
 
     # --- Vehicle Detection Stage ---
     if args.use_detection:
@@ -40,6 +50,10 @@ def main():
             print("Error: Model weights not found!")
             print(f"Please download 'yolov2.weights' and place it in the '{os.path.basename(config.BASE_DIR)}/bin/' directory.")
             sys.exit(1)
+        if args.cascade and not os.path.exists(config.CASCADE_MODEL_WEIGHTS):
+            print("Error: Cascade model weights not found!")
+            print(f"Please download '{os.path.basename(config.CASCADE_MODEL_WEIGHTS)}' and place it in the '{os.path.basename(config.BASE_DIR)}/bin/' directory.")
+            sys.exit(1)
             
         # Check if the image path exists
         if not os.path.exists(args.image_path):
@@ -47,8 +61,9 @@ def main():
             sys.exit(1)
 
         print("--- Starting Vehicle Detection ---")
-        detector = VehicleDetector()
-        vehicle_counts = detector.detect_vehicles(args.image_path)
+        detector = CascadeDetector() if args.cascade else VehicleDetector()
+        class_counts = detector.count_vehicles(args.image_path)
+        vehicle_counts = dict(zip(config.LANE_ZONES, class_counts.sum(axis=1).tolist()))
         print("\n--- Detection Complete ---")
         print("Detected Vehicle Counts:")
         print(json.dumps(vehicle_counts, indent=4))
@@ -61,7 +76,7 @@ def main():
     arduino_comm = ArduinoConnector() if config.ENABLE_ARDUINO else None
 
     # Initialize the core logic and GUI
-    traffic_manager = TrafficManager(vehicle_counts)
+    traffic_manager = TrafficManager(class_counts)
     gui = SimulationGUI()
 
     # Run the main game loop
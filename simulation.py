@@ -10,6 +10,7 @@ import random
 import math
 import time
 import threading
+import numpy as np
 # from vehicle_detection import detection
 import pygame
 import sys
@@ -65,6 +66,7 @@ y = {'right':[348,370,398], 'down':[0,0,0], 'left':[498,466,436], 'up':[800,800,
 
 vehicles = {'right': {0:[], 1:[], 2:[], 'crossed':0}, 'down': {0:[], 1:[], 2:[], 'crossed':0}, 'left': {0:[], 1:[], 2:[], 'crossed':0}, 'up': {0:[], 1:[], 2:[], 'crossed':0}}
 vehicleTypes = {0:'car', 1:'bus', 2:'truck', 3:'rickshaw', 4:'bike'}
+vehicleClassIndex = {vclass: index for index, vclass in vehicleTypes.items()}
 directionNumbers = {0:'right', 1:'down', 2:'left', 3:'up'}
 
 # Coordinates of signal image, timer, and vehicle count
@@ -290,29 +292,12 @@ def setTime():
     # greenTime = len(vehicles[currentGreen][0])+len(vehicles[currentGreen][1])+len(vehicles[currentGreen][2])
     # noOfVehicles = len(vehicles[directionNumbers[nextGreen]][1])+len(vehicles[directionNumbers[nextGreen]][2])-vehicles[directionNumbers[nextGreen]]['crossed']
     # print("no. of vehicles = ",noOfVehicles)
-    noOfCars, noOfBuses, noOfTrucks, noOfRickshaws, noOfBikes = 0,0,0,0,0
-    for j in range(len(vehicles[directionNumbers[nextGreen]][0])):
-        vehicle = vehicles[directionNumbers[nextGreen]][0][j]
-        if(vehicle.crossed==0):
-            vclass = vehicle.vehicleClass
-            # print(vclass)
-            noOfBikes += 1
-    for i in range(1,3):
-        for j in range(len(vehicles[directionNumbers[nextGreen]][i])):
-            vehicle = vehicles[directionNumbers[nextGreen]][i][j]
-            if(vehicle.crossed==0):
-                vclass = vehicle.vehicleClass
-                # print(vclass)
-                if(vclass=='car'):
-                    noOfCars += 1
-                elif(vclass=='bus'):
-                    noOfBuses += 1
-                elif(vclass=='truck'):
-                    noOfTrucks += 1
-                elif(vclass=='rickshaw'):
-                    noOfRickshaws += 1
-    # print(noOfCars)
-    greenTime = math.ceil(((noOfCars*carTime) + (noOfRickshaws*rickshawTime) + (noOfBuses*busTime) + (noOfTrucks*truckTime)+ (noOfBikes*bikeTime))/(noOfLanes+1))
+    # count the waiting vehicles of each class (columns in vehicleTypes order) in one pass
+    waiting = [vehicleClassIndex[vehicle.vehicleClass] for i in range(0,3) for vehicle in vehicles[directionNumbers[nextGreen]][i] if vehicle.crossed==0]
+    classCounts = np.bincount(np.array(waiting, dtype=np.intp), minlength=len(vehicleTypes))
+    noOfCars, noOfBuses, noOfTrucks, noOfRickshaws, noOfBikes = classCounts.tolist()
+    passTimes = np.array([carTime, busTime, truckTime, rickshawTime, bikeTime])
+    greenTime = math.ceil((classCounts @ passTimes)/(noOfLanes+1))
     # greenTime = math.ceil((noOfVehicles)/noOfLanes) 
     print('Green Time: ',greenTime)
     if(greenTime<defaultMinimum):
@@ -2,6 +2,7 @@
 
 import random
 import time
+import numpy as np
 import pygame
 from vehicle import Vehicle
 import config
@@ -11,15 +12,19 @@ class TrafficManager:
     Manages the core logic of the traffic simulation, including traffic light control,
     vehicle generation, and vehicle movement.
     """
-    def __init__(self, vehicle_counts):
+    def __init__(self, class_counts):
         """
         Initializes the TrafficManager.
 
         Args:
-            vehicle_counts (dict): A dictionary with the number of vehicles for each lane.
+            class_counts (np.ndarray): A (lanes, classes) matrix with the number of vehicles
+                                       of each class in each lane. Rows follow the lane
+                                       order of `config.LANE_ZONES` and columns follow
+                                       `config.VEHICLE_CLASSES`.
         """
-        self.vehicle_counts = vehicle_counts
-        self.lanes = {"right": [], "left": [], "down": [], "up": []}
+        self.class_counts = np.asarray(class_counts)
+        self.lane_names = list(config.LANE_ZONES)
+        self.lanes = {lane: [] for lane in self.lane_names}
         
         # Simulation state variables
         self.current_green_lane_index = 0
@@ -36,22 +41,17 @@ class TrafficManager:
     def _calculate_green_times(self):
         """
         Calculates the duration of the green signal for each lane based on traffic density.
-        The duration is proportional to the number of vehicles, with a minimum base time.
+        Each lane's demand is its vehicle counts weighted by the per-class pass times, and
+        the duration is the base time plus the lane's share of the total demand.
         """
-        total_vehicles = sum(self.vehicle_counts.values())
-        green_times = {}
+        pass_times = np.array([config.VEHICLE_PASS_TIMES[c] for c in config.VEHICLE_CLASSES])
+        demand = self.class_counts @ pass_times
+        total_demand = demand.sum()
 
-        if total_vehicles == 0:
-            # If no vehicles are detected, assign a default base time to all lanes
-            for lane in self.signal_lanes_order:
-                green_times[lane] = config.GREEN_SIGNAL_BASE_TIME
-        else:
-            # Distribute time proportionally
-            for lane in self.signal_lanes_order:
-                proportion = self.vehicle_counts.get(lane, 0) / total_vehicles
-                # Time is base time + proportional extra time (scaled)
-                additional_time = proportion * config.GREEN_SIGNAL_BASE_TIME
-                green_times[lane] = int(config.GREEN_SIGNAL_BASE_TIME + additional_time)
+        # If no vehicles are detected, every lane gets the base time
+        share = demand / total_demand if total_demand > 0 else np.zeros_like(demand)
+        times = (config.GREEN_SIGNAL_BASE_TIME * (1 + share)).astype(int)
+        green_times = dict(zip(self.lane_names, times.tolist()))
         
         print("Calculated Green Signal Times (ms):", green_times)
         return green_times
@@ -60,9 +60,10 @@ class TrafficManager:
         """
         Creates and populates the vehicle sprites for each lane based on the counts.
         """
-        for lane_direction, count in self.vehicle_counts.items():
-            for _ in range(count):
-                self.lanes[lane_direction].append(Vehicle(lane_direction))
+        for lane_direction, lane_counts in zip(self.lane_names, self.class_counts):
+            for vehicle_type, count in zip(config.VEHICLE_CLASSES, lane_counts):
+                for _ in range(count):
+                    self.lanes[lane_direction].append(Vehicle(lane_direction, vehicle_type))
 
     def update(self):
         """
@@ -124,7 +125,7 @@ class TrafficManager:
         signal_state[active_lane] = self.current_signal_color
 
         all_vehicles = pygame.sprite.Group(
-            self.lanes['right'] + self.lanes['left'] + self.lanes['up'] + self.lanes['down']
+            [vehicle for lane in self.lane_names for vehicle in self.lanes[lane]]
         )
         
         return {
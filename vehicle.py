@@ -18,17 +18,18 @@ class Vehicle(pygame.sprite.Sprite):
     # Define where vehicles should disappear after crossing the intersection
     DISAPPEAR_LINES = {'right': -200, 'left': 1600, 'up': -200, 'down': 1000}
 
-    def __init__(self, direction):
+    def __init__(self, direction, vehicle_type=None):
         """
         Initializes a vehicle sprite.
 
         Args:
             direction (str): The direction the vehicle is traveling from ('right', 'left', 'up', 'down').
+            vehicle_type (str, optional): One of `VEHICLE_TYPES`. A random type is chosen if omitted.
         """
         super().__init__()
         
         self.direction = direction
-        self.type = random.choice(self.VEHICLE_TYPES)
+        self.type = vehicle_type if vehicle_type is not None else random.choice(self.VEHICLE_TYPES)
         self.speed = random.randint(10, 20)
         
         # Load the vehicle's image
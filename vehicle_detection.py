@@ -1,37 +1,148 @@
-import cv2
-from darkflow.net.build import  TFNet 
-import matplotlib.pyplot as plt
+# vehicle_detection.py
+
+"""
+Batch annotator for a directory of camera snapshots.
+
+Images are decoded by a pool of reader threads, forwarded through the
+network in batches, and annotated and encoded by a pool of writer threads,
+so that disk I/O and JPEG coding overlap with inference.
+"""
+
+import argparse
+import json
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from darkflow.net.build import TFNet
+from detection_cache import DetectionCache
+import config
+
+VEHICLE_LABELS = {'car', 'bus', 'bike', 'truck', 'rickshaw'}
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def read_image(path):
+    """
+    Reads and decodes an image file.
+
+    Returns:
+        tuple: The raw file bytes and the decoded BGR image (None if it cannot be decoded).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    return data, image
+
+def write_output(output_dir, filename, image, result, json_only):
+    """
+    Writes the detections of one image, either as a JSON file or as an annotated copy
+    of the image with a green box and label drawn around each vehicle.
+    """
+    if json_only:
+        output_filename = os.path.join(output_dir, os.path.splitext(filename)[0] + ".json")
+        with open(output_filename, 'w') as f:
+            json.dump(result, f, default=float)
+        return output_filename
+
+    for vehicle in result:
+        label = vehicle['label']
+        if label in VEHICLE_LABELS:
+            top_left = (vehicle['topleft']['x'], vehicle['topleft']['y'])
+            bottom_right = (vehicle['bottomright']['x'], vehicle['bottomright']['y'])
+            cv2.rectangle(image, top_left, bottom_right, (0, 255, 0), 3)
+            cv2.putText(image, label, top_left, cv2.FONT_HERSHEY_COMPLEX, 0.5, (0, 0, 0), 1)
+    output_filename = os.path.join(output_dir, "output_" + filename)
+    cv2.imwrite(output_filename, image)
+    return output_filename
+
+def main():
+    """
+    Annotates every image in the input directory and reports the throughput.
+    """
+    parser = argparse.ArgumentParser(description="Detect and annotate vehicles in a directory of images.")
+    parser.add_argument('--input-dir', type=str, default=os.path.join(os.getcwd(), "test_images"),
+                        help="Directory containing the images to annotate.")
+    parser.add_argument('--output-dir', type=str, default=os.path.join(os.getcwd(), "output_images"),
+                        help="Directory where the annotated images (or JSON files) are written.")
+    parser.add_argument('--model', type=str, default='./cfg/yolo.cfg', help="Path to the model configuration.")
+    parser.add_argument('--load', type=str, default='./bin/yolov2.weights', help="Path to the model weights.")
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help="Minimum confidence factor to create a box.")
+    parser.add_argument('--batch', type=int, default=8, help="Number of images per forward pass.")
+    parser.add_argument('--readers', type=int, default=4, help="Number of image decoding threads.")
+    parser.add_argument('--writers', type=int, default=4, help="Number of annotation and encoding threads.")
+    parser.add_argument('--json-only', action='store_true',
+                        help="Write the detections as JSON files instead of annotated images.")
+    args = parser.parse_args()
+
+    filenames = sorted(f for f in os.listdir(args.input_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+    if not filenames:
+        print(f"No images found in '{args.input_dir}'.")
+        return
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {
+        'model': args.model,
+        'load': args.load,
+        'threshold': args.threshold
+    }
+    tfnet = TFNet(options)
+    cache = None
+    if config.ENABLE_DETECTION_CACHE:  # skip inference for images that were already analysed with this model
+        cache = DetectionCache(config.DETECTION_CACHE_DIR, args.model, args.load, args.threshold,
+                               config.DETECTION_CACHE_MAX_ENTRIES)
+
+    batches = [filenames[i:i + args.batch] for i in range(0, len(filenames), args.batch)]
+    # Bound the number of annotated images waiting to be written
+    max_pending = 2 * args.batch * args.writers
+    processed = 0
+    start = time.time()
+
+    with ThreadPoolExecutor(args.readers) as readers, ThreadPoolExecutor(args.writers) as writers:
+        def submit_reads(batch):
+            return [readers.submit(read_image, os.path.join(args.input_dir, f)) for f in batch]
+
+        pending_writes = deque()
+        next_reads = submit_reads(batches[0])
+        for index, batch in enumerate(batches):
+            decoded = [future.result() for future in next_reads]
+            # Decode the next batch while this one is in inference
+            if index + 1 < len(batches):
+                next_reads = submit_reads(batches[index + 1])
+
+            names, images, keys, results = [], [], [], []
+            for filename, (data, image) in zip(batch, decoded):
+                if image is None:
+                    print(f"Skipping '{filename}': could not decode image.")
+                    continue
+                key = cache.key(data) if cache is not None else None
+                names.append(filename)
+                images.append(image)
+                keys.append(key)
+                results.append(cache.get(key) if key is not None else None)
+
+            missing = [i for i, result in enumerate(results) if result is None]
+            if missing:
+                predicted = tfnet.return_predict_batch([images[i] for i in missing])
+                for i, result in zip(missing, predicted):
+                    results[i] = result
+                    if keys[i] is not None:
+                        cache.put(keys[i], result)
+
+            for filename, image, result in zip(names, images, results):
+                pending_writes.append(writers.submit(
+                    write_output, args.output_dir, filename, image, result, args.json_only))
+            processed += len(names)
+            while len(pending_writes) > max_pending:
+                print('Output stored at:', pending_writes.popleft().result())
+
+        while pending_writes:
+            print('Output stored at:', pending_writes.popleft().result())
+
+    elapsed = time.time() - start
+    print(f"Done! Processed {processed} images in {elapsed:.2f}s ({processed / max(elapsed, 1e-9):.2f} images/s).")
 
-options={
-   'model':'./cfg/yolo.cfg',        #specifying the path of model
-   'load':'./bin/yolov2.weights',   #weights
-   'threshold':0.3                  #minimum confidence factor to create a box, greater than 0.3 good
-}
-
-tfnet=TFNet(options) 
-inputPath = os.getcwd() + "/test_images/"
-outputPath = os.getcwd() + "/output_images/"
-
-def detectVehicles(filename):
-   global tfnet, inputPath, outputPath
-   img=cv2.imread(inputPath+filename,cv2.IMREAD_COLOR)
-   result=tfnet.return_predict(img)
-   for vehicle in result:
-      label=vehicle['label']   #extracting label
-      if(label=="car" or label=="bus" or label=="bike" or label=="truck" or label=="rickshaw"):    # drawing box and writing label
-         top_left=(vehicle['topleft']['x'],vehicle['topleft']['y'])
-         bottom_right=(vehicle['bottomright']['x'],vehicle['bottomright']['y'])
-         img=cv2.rectangle(img,top_left,bottom_right,(0,255,0),3)    #green box of width 5
-         img=cv2.putText(img,label,top_left,cv2.FONT_HERSHEY_COMPLEX,0.5,(0,0,0),1)   #image, label, position, font, font scale, colour: black, line width      
-   outputFilename = outputPath + "output_" +filename
-   cv2.imwrite(outputFilename,img)
-   print('Output image stored at:', outputFilename)
-   # plt.imshow(img)
-   # plt.show()
-   # return result
-
-for filename in os.listdir(inputPath):
-   if(filename.endswith(".png") or filename.endswith(".jpg") or filename.endswith(".jpeg")):
-      detectVehicles(filename)
-print("Done!")
+if __name__ == '__main__':
+    main()
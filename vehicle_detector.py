@@ -2,102 +2,194 @@
 
 import cv2
 import json
+import numpy as np
 from darkflow.net.build import TFNet
+from darkflow.utils.box import Detections
+from detection_cache import DetectionCache
+from lane_zones import LaneZoneIndex
 import config
 
 class VehicleDetector:
     """
     A class to detect vehicles in an image using a pre-trained YOLO model.
-    It identifies vehicles in four specific regions of interest (ROIs)
-    corresponding to a four-way intersection.
+    It assigns vehicles to the lanes of a four-way intersection using the
+    polygonal lane zones defined in the configuration file.
     """
 
-    def __init__(self):
+    def __init__(self, model_cfg=config.MODEL_CFG, model_weights=config.MODEL_WEIGHTS,
+                 threshold=config.DETECTION_THRESHOLD, registry=None, model_name='full'):
         """
-        Initializes the VehicleDetector by loading the YOLO model with
-        pre-trained weights using the Darkflow framework.
+        Initializes the VehicleDetector. The YOLO model is loaded with pre-trained
+        weights using the Darkflow framework the first time it is needed, so runs
+        answered entirely from the detection cache never load it.
+
+        Args:
+            model_cfg (str, optional): Path to the model configuration file.
+            model_weights (str, optional): Path to the model weights file.
+            threshold (float, optional): Detection threshold of the model.
+            registry (ModelRegistry, optional): Registry hosting the model together with
+                                                others in this process, sharing their
+                                                thread pools. Without one the model is
+                                                loaded on its own.
+            model_name (str, optional): Name of the model in the registry.
         """
         # Define model options based on the configuration file
-        options = {
-            "model": config.MODEL_CFG,
-            "load": config.MODEL_WEIGHTS,
-            "threshold": config.DETECTION_THRESHOLD,
+        self.options = {
+            "model": model_cfg,
+            "load": model_weights,
+            "threshold": threshold,
             "gpu": 0.7  # Use 70% of GPU memory, if available
         }
-        
-        # Load the TensorFlow model
-        print("Loading vehicle detection model...")
-        self.tfnet = TFNet(options)
-        print("Model loaded successfully.")
+        self._tfnet = None
+        self.registry = registry
+        self.model_name = model_name
+        if registry is not None and model_name not in registry:
+            registry.add(model_name, self.options)
+
+        # Cache of previous detection results, keyed by image content and model
+        self.cache = None
+        if config.ENABLE_DETECTION_CACHE:
+            self.cache = DetectionCache(
+                config.DETECTION_CACHE_DIR, model_cfg, model_weights,
+                threshold, config.DETECTION_CACHE_MAX_ENTRIES)
+
+        # Map the labels of vehicles we want to detect to their class column
+        self.vehicle_classes = config.VEHICLE_CLASSES
+        self.label_columns = {
+            label: self.vehicle_classes.index(vehicle_class)
+            for label, vehicle_class in config.DETECTION_LABEL_CLASSES.items()
+        }
 
-        # Define the labels of vehicles we want to detect
-        self.vehicle_labels = {'car', 'bus', 'truck', 'motorbike'}
+        # Lane zones used to assign detected vehicles to lanes
+        self.lane_zones = LaneZoneIndex()
 
-    def detect_vehicles(self, image_path):
+    @property
+    def tfnet(self):
         """
-        Detects vehicles in the given image and counts them per lane.
+        The TensorFlow model, loaded on first access.
+        """
+        if self.registry is not None:
+            return self.registry.get(self.model_name)
+        if self._tfnet is None:
+            print("Loading vehicle detection model...")
+            self._tfnet = TFNet(self.options)
+            print("Model loaded successfully.")
+        return self._tfnet
+
+    def predict(self, image, image_bytes=None):
+        """
+        Returns the model predictions for an image, using the detection cache when possible.
+
+        Args:
+            image (np.ndarray): A BGR image as returned by `cv2.imread`.
+            image_bytes (bytes, optional): The encoded image `image` was decoded from,
+                                           which keys the detection cache. Without it
+                                           the cache is bypassed.
+
+        Returns:
+            Detections: Parallel arrays of box corners, scores and class indices, as
+                        returned by `TFNet.return_predict_arrays`.
+        """
+        if self.cache is None or image_bytes is None:
+            return self.tfnet.return_predict_arrays(image)
+        cache_key = self.cache.key(image_bytes)
+        predictions = self.cache.get(cache_key)
+        if predictions is not None:
+            return Detections.from_dicts(predictions)
+        detections = self.tfnet.return_predict_arrays(image)
+        self.cache.put(cache_key, detections.to_dicts())
+        return detections
+
+    def vehicle_detections(self, image, image_bytes=None):
+        """
+        Runs the model on an image and keeps only the vehicle detections.
+
+        Args:
+            image (np.ndarray): A BGR image as returned by `cv2.imread`.
+            image_bytes (bytes, optional): The encoded image, see `predict`.
+
+        Returns:
+            tuple: An (N, 4) array of (top_x, top_y, bottom_x, bottom_y) boxes, an
+                   (N,) array of their class columns in `config.VEHICLE_CLASSES` and
+                   an (N,) array of their confidence scores.
+        """
+        detections = self.predict(image, image_bytes)
+        # Class column of each label the detections refer to, -1 for non-vehicles
+        label_columns = np.array([self.label_columns.get(label, -1) for label in detections.labels],
+                                 dtype=np.intp)
+        class_ids = label_columns[detections.class_id]
+        vehicles = class_ids >= 0
+        return (detections.xyxy[vehicles].astype(np.float64), class_ids[vehicles],
+                detections.score[vehicles])
+
+    def vehicle_boxes(self, image, image_bytes=None):
+        """
+        Runs the model on an image and keeps only the vehicle boxes.
+
+        Args:
+            image (np.ndarray): A BGR image as returned by `cv2.imread`.
+            image_bytes (bytes, optional): The encoded image, see `predict`.
+
+        Returns:
+            tuple: An (N, 4) array of (top_x, top_y, bottom_x, bottom_y) boxes and an
+                   (N,) array of their class columns in `config.VEHICLE_CLASSES`.
+        """
+        boxes, class_ids, _ = self.vehicle_detections(image, image_bytes)
+        return boxes, class_ids
+
+    def count_vehicles(self, image_path):
+        """
+        Detects vehicles in the given image and counts them per lane and per class.
 
         Args:
             image_path (str): The path to the image file to be processed.
 
         Returns:
-            dict: A dictionary containing the vehicle count for each of the four lanes
-                  ('right', 'left', 'up', 'down').
+            np.ndarray: A (lanes, classes) integer matrix of vehicle counts. Rows follow
+                        the lane order of `config.LANE_ZONES` and columns follow
+                        `config.VEHICLE_CLASSES`.
         """
+        counts = np.zeros((len(self.lane_zones.lanes), len(self.vehicle_classes)), dtype=np.int64)
         try:
-            # Read the image from the specified path
-            image = cv2.imread(image_path)
+            # Read the encoded image once: its bytes key the detection cache
+            with open(image_path, 'rb') as f:
+                image_bytes = f.read()
+            image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
             if image is None:
-                raise FileNotFoundError(f"Image not found at path: {image_path}")
+                raise ValueError(f"Could not decode image at path: {image_path}")
 
             # Get image dimensions
             height, width, _ = image.shape
 
-            # Use the loaded model to get predictions from the image
-            predictions = self.tfnet.return_predict(image)
-
-            # Define the regions of interest (ROIs) for each lane
-            # These ROIs are defined as percentages of the image dimensions
-            # to remain scalable for different image sizes.
-            # Format: (x_start, y_start, x_end, y_end)
-            rois = {
-                'right': (width // 2, 0, width, height // 2),
-                'left': (0, height // 2, width // 2, height),
-                'up': (0, 0, width // 2, height // 2),
-                'down': (width // 2, height // 2, width, height)
-            }
-
-            # Initialize a dictionary to store the count of vehicles in each lane
-            vehicle_counts = {lane: 0 for lane in rois}
-
-            # Iterate through each prediction from the model
-            for prediction in predictions:
-                label = prediction['label']
-                
-                # Check if the detected object is a vehicle
-                if label in self.vehicle_labels:
-                    # Get the coordinates of the bounding box
-                    top_x = prediction['topleft']['x']
-                    top_y = prediction['topleft']['y']
-                    bottom_x = prediction['bottomright']['x']
-                    bottom_y = prediction['bottomright']['y']
-                    
-                    # Calculate the center of the bounding box
-                    center_x = (top_x + bottom_x) / 2
-                    center_y = (top_y + bottom_y) / 2
-
-                    # Check which ROI the center of the vehicle falls into
-                    for lane, (x1, y1, x2, y2) in rois.items():
-                        if x1 < center_x < x2 and y1 < center_y < y2:
-                            vehicle_counts[lane] += 1
-                            break # Move to the next prediction once assigned to a lane
-
-            return vehicle_counts
+            # Use the loaded model to get the vehicle bounding boxes
+            boxes, class_ids = self.vehicle_boxes(image, image_bytes)
+
+            # Assign each box center to a lane in a single lookup against the
+            # rasterized lane zones, then accumulate the (lane, class) pairs
+            centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+            lane_ids = self.lane_zones.assign(centers, width, height)
+            in_lane = lane_ids != LaneZoneIndex.UNASSIGNED
+            np.add.at(counts, (lane_ids[in_lane], class_ids[in_lane]), 1)
 
         except Exception as e:
             print(f"An error occurred during vehicle detection: {e}")
-            # Return zero counts in case of an error
-            return {'right': 0, 'left': 0, 'up': 0, 'down': 0}
+            # Leave the counts at zero in case of an error
+
+        return counts
+
+    def detect_vehicles(self, image_path):
+        """
+        Detects vehicles in the given image and counts them per lane.
+
+        Args:
+            image_path (str): The path to the image file to be processed.
+
+        Returns:
+            dict: A dictionary containing the vehicle count for each lane defined in
+                  `config.LANE_ZONES` (by default 'right', 'left', 'up', 'down').
+        """
+        counts = self.count_vehicles(image_path)
+        return dict(zip(self.lane_zones.lanes, counts.sum(axis=1).tolist()))
 
 if __name__ == '__main__':
     """
@@ -0,0 +1,317 @@
+# vehicle_tracker.py
+
+import time
+from collections import deque
+import numpy as np
+from lane_zones import LaneZoneIndex
+import config
+
+def box_iou_matrix(boxes_a, boxes_b):
+    """
+    Computes the pairwise IoU between two sets of boxes.
+
+    Args:
+        boxes_a (np.ndarray): An (N, 4) array of (x1, y1, x2, y2) boxes.
+        boxes_b (np.ndarray): An (M, 4) array of (x1, y1, x2, y2) boxes.
+
+    Returns:
+        np.ndarray: An (N, M) array of IoU values.
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    overlap = np.clip(bottom_right - top_left, 0, None)
+    intersection = overlap[..., 0] * overlap[..., 1]
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+class VehicleTracker:
+    """
+    Tracks vehicles across video frames to turn per-frame detections into
+    traffic flow measurements.
+
+    Each track follows a constant-velocity Kalman filter on its box center.
+    Tracks are associated with detections by IoU, and all tracks are stored
+    as NumPy arrays so that prediction, association and correction run as
+    batched array operations. Confirmed tracks are used to measure per-lane
+    arrival rates, stop-line crossings and queue lengths.
+    """
+    # Standard deviation of the measured box center (pixels)
+    MEASUREMENT_NOISE = 4.0
+    # Standard deviation of the unmodelled acceleration (pixels / s^2)
+    PROCESS_NOISE = 50.0
+    # Initial standard deviation of an unobserved velocity (pixels / s)
+    INITIAL_VELOCITY_STD = 100.0
+
+    def __init__(self, lane_zones=None, stop_lines=None):
+        """
+        Initializes an empty tracker.
+
+        Args:
+            lane_zones (LaneZoneIndex, optional): Zones used to assign tracks to lanes.
+            stop_lines (dict, optional): Lane name -> stop line segment in fractional
+                                         image coordinates. Defaults to `config.STOP_LINES`.
+        """
+        self.lane_zones = lane_zones if lane_zones is not None else LaneZoneIndex()
+        self.lanes = self.lane_zones.lanes
+        if stop_lines is None:
+            stop_lines = config.STOP_LINES
+        self._stop_lines = np.array([stop_lines[lane] for lane in self.lanes], dtype=np.float64)
+
+        self.iou_threshold = config.TRACKER_IOU_THRESHOLD
+        self.max_missed = config.TRACKER_MAX_MISSED
+        self.min_hits = config.TRACKER_MIN_HITS
+        self.queue_speed = config.TRACKER_QUEUE_SPEED
+        self.rate_window = config.TRACKER_RATE_WINDOW
+
+        # Per-track arrays: Kalman state (cx, cy, vx, vy), its covariance,
+        # box size (w, h) and bookkeeping
+        self._state = np.zeros((0, 4))
+        self._cov = np.zeros((0, 4, 4))
+        self._size = np.zeros((0, 2))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._hits = np.zeros(0, dtype=np.int64)
+        self._missed = np.zeros(0, dtype=np.int64)
+        self._lane = np.zeros(0, dtype=np.intp)
+        self._side = np.zeros(0)
+        self._confirmed = np.zeros(0, dtype=bool)
+        self._crossed = np.zeros(0, dtype=bool)
+
+        self._next_id = 0
+        self._last_time = None
+        self._start_time = None
+        self._arrivals = deque()  # (timestamp, lane index) of confirmed tracks
+        self.crossings = np.zeros(len(self.lanes), dtype=np.int64)
+
+    def update(self, boxes, width, height, timestamp=None):
+        """
+        Advances the tracker by one frame.
+
+        Args:
+            boxes (np.ndarray): An (N, 4) array of (x1, y1, x2, y2) vehicle boxes in pixels.
+            width (int): Frame width in pixels.
+            height (int): Frame height in pixels.
+            timestamp (float, optional): Capture time of the frame in seconds.
+                                         Defaults to the current time.
+
+        Returns:
+            np.ndarray: An (T, 5) array of (track_id, x1, y1, x2, y2) for the
+                        confirmed tracks matched in this frame.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if self._start_time is None:
+            self._start_time = timestamp
+        dt = 0.0 if self._last_time is None else max(timestamp - self._last_time, 0.0)
+        self._last_time = timestamp
+
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self._predict(dt)
+
+        track_idx, det_idx = self._associate(boxes)
+        self._correct(track_idx, boxes[det_idx])
+
+        unmatched = np.ones(len(self._ids), dtype=bool)
+        unmatched[track_idx] = False
+        self._missed[unmatched] += 1
+
+        new_dets = np.ones(len(boxes), dtype=bool)
+        new_dets[det_idx] = False
+        self._spawn(boxes[new_dets], width, height)
+
+        self._update_lanes(width, height)
+        self._update_confirmations(timestamp)
+        self._update_crossings(width, height)
+
+        alive = self._missed <= self.max_missed
+        self._keep(alive)
+
+        visible = self._confirmed & (self._missed == 0)
+        return np.column_stack([self._ids[visible], self._boxes()[visible]])
+
+    def lane_statistics(self):
+        """
+        Summarises the traffic flow observed on each lane.
+
+        Returns:
+            dict: Lane name -> dict with the 'arrival_rate' (vehicles per second over
+                  the rate window), cumulative stop-line 'crossings' and current
+                  'queue_length'.
+        """
+        if self._last_time is not None:
+            while self._arrivals and self._arrivals[0][0] < self._last_time - self.rate_window:
+                self._arrivals.popleft()
+            span = min(self.rate_window, max(self._last_time - self._start_time, 1e-9))
+        else:
+            span = self.rate_window
+        arrival_lanes = np.array([lane for _, lane in self._arrivals], dtype=np.intp)
+        arrival_rates = np.bincount(arrival_lanes, minlength=len(self.lanes)) / span
+
+        speed = np.hypot(self._state[:, 2], self._state[:, 3])
+        queued = (self._confirmed & ~self._crossed & (self._lane >= 0)
+                  & (self._missed == 0) & (speed < self.queue_speed))
+        queue_lengths = np.bincount(self._lane[queued], minlength=len(self.lanes))
+
+        return {
+            lane: {
+                'arrival_rate': float(arrival_rates[i]),
+                'crossings': int(self.crossings[i]),
+                'queue_length': int(queue_lengths[i])
+            }
+            for i, lane in enumerate(self.lanes)
+        }
+
+    def _boxes(self):
+        """Returns the current track boxes as an (N, 4) array of (x1, y1, x2, y2)."""
+        half = self._size / 2
+        return np.hstack([self._state[:, :2] - half, self._state[:, :2] + half])
+
+    def _predict(self, dt):
+        """Propagates every track state by `dt` seconds under constant velocity."""
+        if dt == 0.0 or not len(self._ids):
+            return
+        transition = np.eye(4)
+        transition[0, 2] = transition[1, 3] = dt
+        q = self.PROCESS_NOISE ** 2
+        noise = np.zeros((4, 4))
+        noise[[0, 1], [0, 1]] = q * dt ** 4 / 4
+        noise[[0, 1, 2, 3], [2, 3, 0, 1]] = q * dt ** 3 / 2
+        noise[[2, 3], [2, 3]] = q * dt ** 2
+        self._state = self._state @ transition.T
+        self._cov = transition @ self._cov @ transition.T + noise
+
+    def _associate(self, boxes):
+        """
+        Greedily matches tracks to detections by descending IoU.
+
+        Returns:
+            tuple: Arrays of matched track indices and detection indices.
+        """
+        if not len(self._ids) or not len(boxes):
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        iou = box_iou_matrix(self._boxes(), boxes)
+        rows, cols = np.nonzero(iou >= self.iou_threshold)
+        order = np.argsort(-iou[rows, cols], kind='stable')
+        used_tracks = np.zeros(iou.shape[0], dtype=bool)
+        used_dets = np.zeros(iou.shape[1], dtype=bool)
+        track_idx, det_idx = [], []
+        for row, col in zip(rows[order], cols[order]):
+            if used_tracks[row] or used_dets[col]:
+                continue
+            used_tracks[row] = used_dets[col] = True
+            track_idx.append(row)
+            det_idx.append(col)
+        return np.array(track_idx, dtype=np.intp), np.array(det_idx, dtype=np.intp)
+
+    def _correct(self, track_idx, boxes):
+        """Applies the Kalman measurement update to matched tracks."""
+        if not len(track_idx):
+            return
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        cov = self._cov[track_idx]
+        innovation = centers - self._state[track_idx, :2]
+        innovation_cov = cov[:, :2, :2] + np.eye(2) * self.MEASUREMENT_NOISE ** 2
+        gain = cov[:, :, :2] @ np.linalg.inv(innovation_cov)
+        self._state[track_idx] += (gain @ innovation[:, :, None])[:, :, 0]
+        self._cov[track_idx] = cov - gain @ cov[:, :2, :]
+        self._size[track_idx] = boxes[:, 2:] - boxes[:, :2]
+        self._hits[track_idx] += 1
+        self._missed[track_idx] = 0
+
+    def _spawn(self, boxes, width, height):
+        """Starts a new tentative track for each unmatched detection."""
+        count = len(boxes)
+        if not count:
+            return
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        cov = np.zeros((count, 4, 4))
+        cov[:, [0, 1], [0, 1]] = self.MEASUREMENT_NOISE ** 2
+        cov[:, [2, 3], [2, 3]] = self.INITIAL_VELOCITY_STD ** 2
+        self._state = np.vstack([self._state, np.hstack([centers, np.zeros((count, 2))])])
+        self._cov = np.concatenate([self._cov, cov])
+        self._size = np.vstack([self._size, boxes[:, 2:] - boxes[:, :2]])
+        self._ids = np.concatenate([self._ids, np.arange(self._next_id, self._next_id + count)])
+        self._next_id += count
+        self._hits = np.concatenate([self._hits, np.ones(count, dtype=np.int64)])
+        self._missed = np.concatenate([self._missed, np.zeros(count, dtype=np.int64)])
+        self._lane = np.concatenate([self._lane, np.full(count, LaneZoneIndex.UNASSIGNED, dtype=np.intp)])
+        self._side = np.concatenate([self._side, np.zeros(count)])
+        self._confirmed = np.concatenate([self._confirmed, np.zeros(count, dtype=bool)])
+        self._crossed = np.concatenate([self._crossed, np.zeros(count, dtype=bool)])
+
+    def _update_lanes(self, width, height):
+        """Assigns a lane to every track that does not have one yet."""
+        pending = self._lane == LaneZoneIndex.UNASSIGNED
+        if pending.any():
+            self._lane[pending] = self.lane_zones.assign(self._state[pending, :2], width, height)
+
+    def _update_confirmations(self, timestamp):
+        """Confirms tracks that reached `min_hits` and records their arrival."""
+        newly_confirmed = ~self._confirmed & (self._hits >= self.min_hits)
+        self._confirmed |= newly_confirmed
+        for lane in self._lane[newly_confirmed & (self._lane >= 0)]:
+            self._arrivals.append((timestamp, lane))
+
+    def _update_crossings(self, width, height):
+        """Counts confirmed tracks whose center moved across their lane's stop line."""
+        candidates = np.flatnonzero(self._confirmed & ~self._crossed & (self._lane >= 0))
+        if not len(candidates):
+            return
+        segments = self._stop_lines[self._lane[candidates]] * np.array([width, height])
+        start, end = segments[:, 0], segments[:, 1]
+        direction = end - start
+        offset = self._state[candidates, :2] - start
+        side = np.sign(direction[:, 0] * offset[:, 1] - direction[:, 1] * offset[:, 0])
+        previous = self._side[candidates]
+        crossed = (previous != 0) & (side != 0) & (side != previous)
+        np.add.at(self.crossings, self._lane[candidates[crossed]], 1)
+        self._crossed[candidates[crossed]] = True
+        self._side[candidates] = np.where(side != 0, side, previous)
+
+    def _keep(self, mask):
+        """Drops every track for which `mask` is False."""
+        self._state = self._state[mask]
+        self._cov = self._cov[mask]
+        self._size = self._size[mask]
+        self._ids = self._ids[mask]
+        self._hits = self._hits[mask]
+        self._missed = self._missed[mask]
+        self._lane = self._lane[mask]
+        self._side = self._side[mask]
+        self._confirmed = self._confirmed[mask]
+        self._crossed = self._crossed[mask]
+
+if __name__ == '__main__':
+    """
+    Runs the detector and tracker over a video file and prints the
+    per-lane flow statistics.
+    """
+    import argparse
+    import json
+    import cv2
+    from vehicle_detector import VehicleDetector
+
+    parser = argparse.ArgumentParser(description="Track vehicles in a video and report per-lane flow.")
+    parser.add_argument("video_path", type=str, help="Path to the input video file.")
+    args = parser.parse_args()
+
+    detector = VehicleDetector()
+    tracker = VehicleTracker(lane_zones=detector.lane_zones)
+    capture = cv2.VideoCapture(args.video_path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+
+    frame_index = 0
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        height, width, _ = frame.shape
+        boxes, _ = detector.vehicle_boxes(frame)
+        tracker.update(boxes, width, height, frame_index / fps)
+        frame_index += 1
+    capture.release()
+
+    print("\n--- Lane Flow Statistics ---")
+    print(json.dumps(tracker.lane_statistics(), indent=4))
+    print("----------------------------")